@@ -0,0 +1,231 @@
+#!/usr/bin/python3
+"""
+ASGI variant of the API: the /api/v1 routes of api.v1.app as coroutines
+awaiting an async storage, so a slow client holds no thread. Serve it
+with any ASGI server, e.g. uvicorn api.v1.asgi:app
+"""
+
+from datetime import datetime
+import json
+from models.amenity import Amenity
+from models.city import City
+from models.engine.async_storage import make_async_storage
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+import re
+
+# the storage every route awaits on
+storage = make_async_storage()
+
+# resource -> (class, parent resource, foreign key to the parent, keys a
+# POST requires in order, keys a PUT leaves untouched), as in the views
+resources = {
+    "states": (State, None, None, ("name",),
+               ("id", "created_at", "updated_at")),
+    "cities": (City, "states", "state_id", ("name",),
+               ("id", "created_at", "updated_at")),
+    "amenities": (Amenity, None, None, ("name",),
+                  ("id", "created_at", "updated_at")),
+    "users": (User, None, None, ("email", "password"),
+              ("id", "email", "created_at", "updated_at")),
+    "places": (Place, "cities", "city_id", ("user_id", "name"),
+               ("id", "user_id", "city_id", "created_at", "updated_at")),
+    "reviews": (Review, "places", "place_id", ("user_id", "text"),
+                ("id", "user_id", "place_id", "created_at", "updated_at")),
+}
+
+# /api/v1/<name>[/<id>[/<resource>]], with or without a trailing slash
+path_re = re.compile(r"^/api/v1/(\w+)(?:/([^/]+))?(?:/(\w+))?/?$")
+
+
+class HTTPError(Exception):
+    """ends a request with status and a JSON body, as abort() does"""
+
+    def __init__(self, status, body=None):
+        """Instantiate the error with its status and JSON body"""
+        super().__init__(status)
+        self.status = status
+        self.body = body if body is not None else {"error": "Not found"}
+
+
+async def status():
+    """Returns status of API"""
+    return 200, {"status": "OK"}
+
+
+async def stats():
+    """Retrieves number of each objects by type"""
+    return 200, {name: await storage.acount(resource[0])
+                 for name, resource in resources.items()}
+
+
+async def metrics():
+    """Retrieves the connection pool metrics of the storage"""
+    if hasattr(storage, "pool_stats"):
+        return 200, {"pool": storage.pool_stats()}
+    return 200, {}
+
+
+async def get_all(name, parent_id=None):
+    """Returns JSON of every object of a resource, or of its parent's"""
+    cls, parent, key = resources[name][:3]
+    if parent_id is None:
+        return 200, await storage.arecords_json(cls)
+    # If no parent object with that id exists, raise a 404 error
+    await get_object(parent, parent_id)
+    return 200, await storage.arecords_json(cls, **{key: parent_id})
+
+
+async def get_object(name, id):
+    """Returns the object of a resource with that id, 404 if none"""
+    obj = await storage.aget(resources[name][0], id)
+    if obj is None:
+        raise HTTPError(404)
+    return obj
+
+
+async def get_one(name, id):
+    """Returns JSON of one object"""
+    return 200, (await get_object(name, id)).to_dict()
+
+
+async def delete_one(name, id):
+    """Deletes an object"""
+    await storage.adelete(await get_object(name, id))
+    await storage.asave()
+    return 200, {}
+
+
+async def create(name, body, parent_id=None):
+    """Creates an object, under its parent object when it has one"""
+    cls, parent, key, required = resources[name][:4]
+    if parent_id is not None:
+        await get_object(parent, parent_id)
+    data = parse_json(body)
+    for field in required:
+        if field not in data:
+            raise HTTPError(400, {"error": "Missing " + field})
+        # The user a place or review belongs to must exist
+        if field == "user_id":
+            await get_object("users", data["user_id"])
+    if parent_id is not None:
+        data[key] = parent_id
+    obj = cls(**data)
+    await storage.anew(obj)
+    await storage.asave()
+    return 201, obj.to_dict()
+
+
+async def update(name, id, body):
+    """Updates an object"""
+    ignored = resources[name][4]
+    obj = await get_object(name, id)
+    data = parse_json(body)
+    for key, value in data.items():
+        if key not in ignored:
+            setattr(obj, key, value)
+    obj.updated_at = datetime.utcnow()
+    await storage.anew(obj)
+    await storage.asave()
+    return 200, obj.to_dict()
+
+
+def parse_json(body):
+    """Returns the JSON object sent in body, 400 Not a JSON otherwise"""
+    try:
+        json_body = json.loads(body)
+    except ValueError:
+        json_body = None
+    if not isinstance(json_body, dict):
+        raise HTTPError(400, {"error": "Not a JSON"})
+    return json_body
+
+
+async def route(method, path, body):
+    """Calls the route for method and path, returns status and body"""
+    match = path_re.match(path)
+    if match is None:
+        raise HTTPError(404)
+    name, id, child = match.groups()
+    if id is None and method == "GET":
+        routes = {"status": status, "stats": stats, "metrics": metrics}
+        if name in routes:
+            return await routes[name]()
+    if name not in resources:
+        raise HTTPError(404)
+    if child is not None:
+        # /<parent>/<id>/<resource>, e.g. /states/<state_id>/cities
+        if child not in resources or resources[child][1] != name:
+            raise HTTPError(404)
+        if method == "GET":
+            return await get_all(child, id)
+        if method == "POST":
+            return await create(child, body, id)
+    elif id is None:
+        # Resources with a parent are listed under it only
+        if resources[name][1] is not None:
+            raise HTTPError(404)
+        if method == "GET":
+            return await get_all(name)
+        if method == "POST":
+            return await create(name, body)
+    else:
+        if method == "GET":
+            return await get_one(name, id)
+        if method == "DELETE":
+            return await delete_one(name, id)
+        if method == "PUT":
+            return await update(name, id, body)
+    raise HTTPError(405, {"error": "Method not allowed"})
+
+
+async def read_body(receive):
+    """Returns the whole request body"""
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return body
+
+
+async def lifespan(receive, send):
+    """Creates the tables at startup and closes the pool at shutdown"""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await storage.areload()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await storage.adispose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """The ASGI application"""
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+    body = await read_body(receive)
+    try:
+        code, payload = await route(scope["method"], scope["path"], body)
+    except HTTPError as error:
+        code, payload = error.status, error.body
+    finally:
+        # Close the storage, as the teardown of the Flask app does
+        await storage.aclose()
+    if isinstance(payload, list):
+        # Lists of records come encoded already
+        payload = "[" + ", ".join(payload) + "]"
+    else:
+        payload = json.dumps(payload)
+    payload = payload.encode("utf-8")
+    await send({"type": "http.response.start", "status": code,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length",
+                             str(len(payload)).encode())]})
+    await send({"type": "http.response.body", "body": payload})
@@ -1,10 +1,17 @@
 #!/usr/bin/python3
 """ Blueprint for API """
-from flask import Blueprint
+from flask import Blueprint, Response
 
 # Create Blueprint
 app_views = Blueprint('app_views', __name__, url_prefix='/api/v1')
 
+
+def json_list(items):
+    """Returns a JSON array response joined from already encoded items"""
+    return Response("[" + ", ".join(items) + "]",
+                    mimetype="application/json")
+
+
 # Wildcard imports
 from api.v1.views.index import *
 from api.v1.views.states import *
@@ -2,7 +2,7 @@
 """Amenity objects that handles all default RestFul API actions"""
 
 # import the necessary modules
-from api.v1.views import app_views
+from api.v1.views import app_views, json_list
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.amenity import Amenity
@@ -13,10 +13,9 @@ from models.amenity import Amenity
 def get_amenities():
     """Returns JSON of all Amenity objects"""
     # Create a list of all Amenity objects
-    amenities = [amenity.to_dict()
-                 for amenity in storage.all("Amenity").values()]
+    amenities = storage.records_json("Amenity")
     # Return a JSON response with the list
-    return jsonify(amenities)
+    return json_list(amenities)
 
 
 # Define route to return JSON of a Amenity object
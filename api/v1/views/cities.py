@@ -2,7 +2,7 @@
 """City objects that handles all default RestFul API actions"""
 
 # import the necessary modules
-from api.v1.views import app_views
+from api.v1.views import app_views, json_list
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.city import City
@@ -19,10 +19,10 @@ def get_cities(state_id):
     # If no State object with that id exists, raise a 404 error
     if state is None:
         abort(404)
-    # Create a list of all City objects in the State object
-    cities = [city.to_dict() for city in state.cities]
+    # Create a list of the City objects of the State object
+    cities = storage.records_json("City", state_id=state_id)
     # Return a JSON response with the list
-    return jsonify(cities)
+    return json_list(cities)
 
 
 # Define route to return JSON of a City object
@@ -103,6 +103,6 @@ def update_city(city_id):
         if key not in ["id", "created_at", "updated_at"]:
             setattr(city, key, value)
     # Save the updated City object
-    storage.save()
+    city.save()
     # Return a JSON response with the City object and status code 200
     return jsonify(city.to_dict()), 200
@@ -34,3 +34,18 @@ def stats():
     # Return a JSON response with the count of each class
     return jsonify({key: storage.count(value) for key,
                     value in classes.items()})
+
+
+# Define route to return JSON storage metrics
+@app_views.route("/metrics")
+def metrics():
+    """Retrieves the connection pool or file load metrics of the storage"""
+    metrics = {}
+    # Database storages report their connection pool
+    if hasattr(storage, "pool_stats"):
+        metrics["pool"] = storage.pool_stats()
+    # File storage reports its last load of the file
+    if hasattr(storage, "load_stats"):
+        metrics["load"] = storage.load_stats()
+    # Return a JSON response with the metrics
+    return jsonify(metrics)
@@ -2,7 +2,7 @@
 """Place objects that handles all default RestFul API actions"""
 
 # import the necessary modules
-from api.v1.views import app_views
+from api.v1.views import app_views, json_list
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.place import Place
@@ -18,10 +18,10 @@ def get_places(city_id):
     # If no City object with that id exists, raise a 404 error
     if city is None:
         abort(404)
-    # Create a list of all Place objects in the City object
-    places = [place.to_dict() for place in city.places]
+    # Create a list of the Place objects of the City object
+    places = storage.records_json("Place", city_id=city_id)
     # Return a JSON response with the list
-    return jsonify(places)
+    return json_list(places)
 
 
 # Define route to return JSON of a Place object
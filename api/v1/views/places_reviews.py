@@ -2,7 +2,7 @@
 """Places_Reviews objects that handles all default RestFul API actions"""
 
 # import the necessary modules
-from api.v1.views import app_views
+from api.v1.views import app_views, json_list
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.review import Review
@@ -18,10 +18,10 @@ def get_reviews(place_id):
     # If no Place object with that id exists, raise a 404 error
     if place is None:
         abort(404)
-    # Create a list of all Review objects in the Place object
-    reviews = [review.to_dict() for review in place.reviews]
+    # Create a list of the Review objects of the Place object
+    reviews = storage.records_json("Review", place_id=place_id)
     # Return a JSON response with the list
-    return jsonify(reviews)
+    return json_list(reviews)
 
 
 # Define route to return JSON of a Review object
@@ -113,6 +113,6 @@ def update_review(review_id):
                        "created_at", "updated_at"]:
             setattr(review, key, value)
     # Save the Review object
-    storage.save()
+    review.save()
     # Return a JSON response with the Review object
     return jsonify(review.to_dict()), 200
@@ -2,7 +2,7 @@
 """States view for api v1"""
 
 # Import necessary modules and classes
-from api.v1.views import app_views
+from api.v1.views import app_views, json_list
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.state import State
@@ -13,9 +13,9 @@ from models.state import State
 def get_states():
     """Returns JSON of all State objects"""
     # Create a list of all State objects
-    states = [state.to_dict() for state in storage.all("State").values()]
+    states = storage.records_json("State")
     # Return a JSON response with the list
-    return jsonify(states)
+    return json_list(states)
 
 
 # Define route to return JSON of a State object
@@ -89,7 +89,7 @@ def update_state(state_id):
     for key, value in json.items():
         if key not in ["id", "created_at", "updated_at"]:
             setattr(state, key, value)
-    # Commit the change
-    storage.save()
+    # Save the updated State object
+    state.save()
     # Return a JSON response with the State object and status code 200
     return jsonify(state.to_dict()), 200
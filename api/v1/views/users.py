@@ -2,7 +2,7 @@
 """User objects that handles all default RestFul API actions"""
 
 # import the necessary modules
-from api.v1.views import app_views
+from api.v1.views import app_views, json_list
 from flask import jsonify, abort, request, make_response
 from models import storage
 from models.user import User
@@ -13,9 +13,9 @@ from models.user import User
 def get_users():
     """Returns JSON of all User objects"""
     # Create a list of all User objects
-    users = [user.to_dict() for user in storage.all("User").values()]
+    users = storage.records_json("User")
     # Return a JSON response with the list
-    return jsonify(users)
+    return json_list(users)
 
 
 # Define route to return JSON of a User object
@@ -91,6 +91,6 @@ def update_user(user_id):
         if key not in ["id", "email", "created_at", "updated_at"]:
             setattr(user, key, value)
     # Save the updated User object
-    storage.save()
+    user.save()
     # Return a JSON response with the User object and status code 200
     return jsonify(user.to_dict()), 200
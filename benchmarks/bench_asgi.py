@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""
+Compares the latency and throughput of the Flask app, on a pool of
+threads as app.run(threaded=True) serves it, with the ASGI app serving
+the same requests as coroutines on one event loop. Both are called in
+process with no HTTP server in front, so the numbers cover the request
+handling and the storage only; run with HBNB_TYPE_STORAGE=sqlite and
+HBNB_SQLITE_PATH pointing at a scratch file to time the async engine.
+
+usage: python3 -m benchmarks.bench_asgi [requests] [concurrency] [path]
+"""
+
+import asyncio
+import models
+from models.state import State
+import sys
+import threading
+import time
+
+
+def report(name, latencies, seconds):
+    """prints the throughput and the latency percentiles of a run"""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    print("{:<6} {:>9} {:>10.3f} {:>10.0f} {:>10.2f} {:>10.2f}".format(
+        name, count, seconds, count / seconds,
+        latencies[count // 2] * 1e3, latencies[count * 99 // 100] * 1e3))
+
+
+def run_wsgi(path, count, concurrency):
+    """serves count requests to path from concurrency threads"""
+    from api.v1.app import app
+    latencies = []
+
+    def worker(requests):
+        """sends requests requests one after the other"""
+        client = app.test_client()
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.get(path).get_data()
+            latencies.append(time.perf_counter() - start)
+    threads = [threading.Thread(target=worker, args=(count // concurrency,))
+               for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - start
+
+
+async def run_asgi(path, count, concurrency):
+    """serves count requests to path from concurrency coroutines"""
+    from api.v1 import asgi
+    await asgi.storage.areload()
+    latencies = []
+
+    async def receive():
+        """returns an empty request body"""
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        """drops the response"""
+
+    async def worker(requests):
+        """sends requests requests one after the other"""
+        for _ in range(requests):
+            start = time.perf_counter()
+            await asgi.app({"type": "http", "method": "GET", "path": path},
+                           receive, send)
+            latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(count // concurrency)
+                           for _ in range(concurrency)])
+    seconds = time.perf_counter() - start
+    await asgi.storage.adispose()
+    return latencies, seconds
+
+
+def main():
+    """prints one line of timings per app"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    path = sys.argv[3] if len(sys.argv) > 3 else "/api/v1/states"
+    storage = models.storage
+    if storage.count(State) < 100:
+        storage.new_many([State(name="bench {}".format(i))
+                          for i in range(100)])
+        storage.save()
+    print("{} storage, {} concurrent clients, GET {}".format(
+        type(storage).__name__, concurrency, path))
+    print("{:<6} {:>9} {:>10} {:>10} {:>10} {:>10}".format(
+        "", "requests", "seconds", "req/s", "p50 ms", "p99 ms"))
+    report("wsgi", *run_wsgi(path, count, concurrency))
+    report("asgi", *asyncio.run(run_asgi(path, count, concurrency)))
+
+
+if __name__ == "__main__":
+    main()
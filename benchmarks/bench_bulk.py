@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+"""
+Compares saving objects one at a time with new_many() and bulk_upsert()
+on the configured storage. FileStorage runs in a temporary directory;
+for SQLite point HBNB_SQLITE_PATH at a scratch file.
+
+usage: python3 -m benchmarks.bench_bulk [number of objects] [one by one]
+"""
+
+import models
+from models.state import State
+import os
+import sys
+import tempfile
+import time
+
+
+def bench(name, count, run):
+    """prints how long run() took to store count objects"""
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    print("{:<12} {:>9} {:>10.3f} {:>12.0f}".format(
+        name, count, seconds, count / seconds))
+
+
+def main():
+    """prints one line of timings per way of storing the objects"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    single = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    storage = models.storage
+    print("{} storage".format(type(storage).__name__))
+    print("{:<12} {:>9} {:>10} {:>12}".format("", "objects", "seconds",
+                                              "objects/s"))
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+
+        def one_by_one():
+            """saves each object on its own, as BaseModel.save() does"""
+            for i in range(single):
+                State(name="one {}".format(i)).save()
+        bench("one by one", single, one_by_one)
+
+        def new_many():
+            """adds every object, then saves once"""
+            storage.new_many([State(name="many {}".format(i))
+                              for i in range(count)])
+            storage.save()
+        bench("new_many", count, new_many)
+
+        records = [{"name": "upsert {}".format(i)} for i in range(count)]
+        bench("bulk_upsert", count,
+              lambda: storage.bulk_upsert(State, records))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+"""
+Compares the BaseModel timestamp helpers with strptime/strftime and
+checks that they give byte-identical results
+
+usage: python3 -m benchmarks.bench_datetime [number of timestamps]
+"""
+
+from datetime import datetime, timedelta
+import sys
+import timeit
+from models.base_model import BaseModel, format_time, parse_time, time
+
+
+def old_to_dict(obj):
+    """BaseModel.to_dict() as it was before the timestamp helpers"""
+    new_dict = obj.__dict__.copy()
+    new_dict["created_at"] = new_dict["created_at"].strftime(time)
+    new_dict["updated_at"] = new_dict["updated_at"].strftime(time)
+    new_dict["__class__"] = obj.__class__.__name__
+    return new_dict
+
+
+def main():
+    """prints the time per call of each helper and its speedup"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    start = datetime(2017, 9, 28, 21, 3, 54, 52298)
+    values = [start + timedelta(seconds=i, microseconds=i * 7)
+              for i in range(count)]
+    texts = [value.strftime(time) for value in values]
+    assert [format_time(value) for value in values] == texts
+    assert [parse_time(text) for text in texts] == values
+    obj = BaseModel()
+    assert obj.to_dict() == old_to_dict(obj)
+    cases = [("parse", lambda: [datetime.strptime(t, time) for t in texts],
+              lambda: [parse_time(t) for t in texts]),
+             ("format", lambda: [v.strftime(time) for v in values],
+              lambda: [format_time(v) for v in values]),
+             ("to_dict", lambda: [old_to_dict(obj) for _ in values],
+              lambda: [obj.to_dict() for _ in values])]
+    print("{} timestamps, identical output checked".format(count))
+    print("{:<8} {:>12} {:>12} {:>8}".format("", "before (us)",
+                                             "after (us)", "speedup"))
+    for name, before, after in cases:
+        old = min(timeit.repeat(before, number=1, repeat=3)) / count * 1e6
+        new = min(timeit.repeat(after, number=1, repeat=3)) / count * 1e6
+        print("{:<8} {:>12.3f} {:>12.3f} {:>7.1f}x".format(name, old, new,
+                                                           old / new))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""
+Compares building the records of a list endpoint from loaded objects,
+as [obj.to_dict() for obj in all(cls).values()], with records(), on
+the configured storage. Run it with HBNB_TYPE_STORAGE=sqlite and
+HBNB_SQLITE_PATH pointing at a scratch file to time the Core read path.
+
+usage: python3 -m benchmarks.bench_records [number of rows] [rounds]
+"""
+
+import models
+from models.state import State
+import sys
+import time
+
+
+def bench(name, count, rounds, run):
+    """prints the best time of rounds calls of run() over count rows"""
+    best = None
+    for _ in range(rounds):
+        models.storage.close()
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    print("{:<12} {:>9} {:>10.3f} {:>12.2f}".format(
+        name, count, best, best / count * 1e6))
+
+
+def main():
+    """prints one line of timings per way of building the records"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    storage = models.storage
+    storage.bulk_upsert(State, [{"name": "records {}".format(i)}
+                                for i in range(count - storage.count(State))])
+    count = storage.count(State)
+    print("{} storage".format(type(storage).__name__))
+    print("{:<12} {:>9} {:>10} {:>12}".format("", "rows", "seconds",
+                                              "us/row"))
+    bench("to_dict", count, rounds, lambda: [
+        obj.to_dict() for obj in storage.all(State).values()])
+    bench("records", count, rounds, lambda: storage.records(State))
+    bench("to_json", count, rounds, lambda: [
+        obj.to_json() for obj in storage.all(State).values()])
+    bench("records_json", count, rounds, lambda: storage.records_json(State))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+Compares the FileStorage snapshot formats: save time, open time (formats
+that map the file and decode records on demand), decode time, load time
+(decode and build the model instances) and file size
+
+usage: python3 -m benchmarks.bench_snapshot [number of objects]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from models.engine.file_storage import classes
+from models.engine import snapshot
+from models.place import Place
+from models.state import State
+from models.user import User
+
+
+def make_entries(count):
+    """returns count (key, record) pairs shaped like a real file.json"""
+    entries = []
+    for i in range(count):
+        if i % 3 == 0:
+            obj = State(name="State {}".format(i))
+        elif i % 3 == 1:
+            obj = User(email="user{}@hbnb.io".format(i), password="pwd",
+                       first_name="First", last_name="Last")
+        else:
+            obj = Place(city_id="c", user_id="u", name="Place {}".format(i),
+                        description="A nice place " * 5, number_rooms=3,
+                        price_by_night=120, latitude=37.77,
+                        longitude=-122.41)
+        entries.append((obj.__class__.__name__ + "." + obj.id,
+                        obj.to_dict()))
+    return entries
+
+
+def bench(name, entries, directory):
+    """returns the save, open, decode and load seconds and the file size"""
+    codec = snapshot.get_codec(name)
+    path = os.path.join(directory, "file." + codec.extension)
+    start = time.perf_counter()
+    with open(path, 'wb') as f:
+        codec.dump(iter(entries), f)
+    saved = time.perf_counter() - start
+    opened = None
+    if hasattr(codec, "open"):
+        start = time.perf_counter()
+        with open(path, 'rb') as f:
+            codec.open(f)
+        opened = time.perf_counter() - start
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        for key, record in codec.load(f):
+            pass
+    decoded = time.perf_counter() - start
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        for key, record in codec.load(f):
+            classes[record["__class__"]](**record)
+    loaded = time.perf_counter() - start
+    return saved, opened, decoded, loaded, os.path.getsize(path)
+
+
+def main():
+    """prints one line of timings per available snapshot format"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    entries = make_entries(count)
+    print("{} objects".format(count))
+    line = "{:<8} {:>9} {:>9} {:>11} {:>9} {:>12}"
+    print(line.format("format", "save (s)", "open (s)", "decode (s)",
+                      "load (s)", "size (bytes)"))
+    with tempfile.TemporaryDirectory() as directory:
+        for name in snapshot.formats:
+            if name == "msgpack" and snapshot.msgpack is None:
+                continue
+            times = bench(name, entries, directory)
+            print(line.format(name, *("-" if t is None else "{:.3f}".format(t)
+                                      for t in times[:4]), times[4]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+"""
+Converts a FileStorage snapshot to another format. The snapshot module
+is loaded from its file alone: importing the models package would load
+the whole storage (or connect to MySQL) before converting anything.
+
+usage: ./convert_snapshot.py src dst [--from FORMAT] --to FORMAT
+"""
+
+import argparse
+import importlib.util
+import os
+
+
+def load_snapshot():
+    """returns models/engine/snapshot.py imported without its package"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "models", "engine", "snapshot.py")
+    spec = importlib.util.spec_from_file_location("snapshot", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(argv=None):
+    """converts the snapshot named on the command line"""
+    snapshot = load_snapshot()
+    parser = argparse.ArgumentParser(
+        description="convert a FileStorage snapshot to another format")
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    parser.add_argument("--from", dest="src_format", default="json",
+                        choices=sorted(snapshot.formats))
+    parser.add_argument("--to", dest="dst_format", required=True,
+                        choices=sorted(snapshot.formats))
+    args = parser.parse_args(argv)
+    snapshot.convert(args.src, args.src_format, args.dst, args.dst_format)
+
+
+if __name__ == "__main__":
+    main()
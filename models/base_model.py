@@ -4,6 +4,7 @@ Contains class BaseModel
 """
 
 from datetime import datetime
+import json
 import models
 from os import getenv
 import sqlalchemy
@@ -19,12 +20,96 @@ else:
     Base = object
 
 
+def parse_time(value):
+    """parses a timestamp in the time format, fast when it is canonical"""
+    if (len(value) == 26 and value[4] == value[7] == "-" and
+            value[10] == "T" and value[13] == value[16] == ":" and
+            value[19] == "." and canonical_digits(value)):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            pass
+        else:
+            if parsed.tzinfo is None:
+                return parsed
+    return datetime.strptime(value, time)
+
+
+def canonical_digits(value):
+    """
+    True if every field of a 26 character timestamp holds ASCII digits,
+    which fromisoformat() parses exactly as strptime() would
+    """
+    digits = (value[:4] + value[5:7] + value[8:10] + value[11:13] +
+              value[14:16] + value[17:19] + value[20:])
+    return digits.isascii() and digits.isdigit()
+
+
+def format_time(value):
+    """formats a datetime exactly as value.strftime(time) does, but faster"""
+    if value.year >= 1000 and value.tzinfo is None:
+        return value.isoformat(timespec="microseconds")
+    return value.strftime(time)
+
+
+class IndexedAttribute:
+    """
+    a file storage model attribute whose changes are reported to the
+    storage, so it can keep its index on that attribute up to date
+    """
+
+    def __init__(self, default=""):
+        """initializes the attribute with its class-level default"""
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        """remembers the attribute name"""
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        """returns the instance value, or the default"""
+        if obj is None:
+            return self.default
+        return obj.__dict__.get(self.name, self.default)
+
+    def __set__(self, obj, value):
+        """sets the instance value and tells the storage about the change"""
+        old = obj.__dict__.get(self.name)
+        obj.__dict__[self.name] = value
+        if old != value and hasattr(models, "storage"):
+            models.storage.reindex(obj, self.name, old)
+
+
 class BaseModel:
     """The BaseModel class from which future classes will be derived"""
     if models.storage_t == "db":
         id = Column(String(60), primary_key=True)
         created_at = Column(DateTime, default=datetime.utcnow)
         updated_at = Column(DateTime, default=datetime.utcnow)
+    else:
+        # __times caches the formatted timestamps and __cache the to_dict()
+        # and JSON forms, outside of __dict__
+        __slots__ = ("__dict__", "__weakref__", "__times", "__cache")
+
+        def __setattr__(self, name, value):
+            """
+            sets an attribute, drops the cached serializations and marks
+            the instance changed in the storage
+            """
+            object.__setattr__(self, name, value)
+            object.__setattr__(self, "_BaseModel__cache", None)
+            if hasattr(models, "storage"):
+                models.storage.touch(self)
+
+        def __delattr__(self, name):
+            """
+            deletes an attribute, drops the cached serializations and marks
+            the instance changed in the storage
+            """
+            object.__delattr__(self, name)
+            object.__setattr__(self, "_BaseModel__cache", None)
+            if hasattr(models, "storage"):
+                models.storage.touch(self)
 
     def __init__(self, *args, **kwargs):
         """Initialization of the base model"""
@@ -33,11 +118,11 @@ class BaseModel:
                 if key != "__class__":
                     setattr(self, key, value)
             if kwargs.get("created_at", None) and type(self.created_at) is str:
-                self.created_at = datetime.strptime(kwargs["created_at"], time)
+                self.created_at = parse_time(kwargs["created_at"])
             else:
                 self.created_at = datetime.utcnow()
             if kwargs.get("updated_at", None) and type(self.updated_at) is str:
-                self.updated_at = datetime.strptime(kwargs["updated_at"], time)
+                self.updated_at = parse_time(kwargs["updated_at"])
             else:
                 self.updated_at = datetime.utcnow()
             if kwargs.get("id", None) is None:
@@ -56,20 +141,62 @@ class BaseModel:
         """updates the attribute 'updated_at' with the current datetime"""
         self.updated_at = datetime.utcnow()
         models.storage.new(self)
-        models.storage.save()
+        return models.storage.save()
 
     def to_dict(self):
         """returns a dictionary containing all keys/values of the instance"""
+        if models.storage_t == "db":
+            return self.__build_dict()
+        return dict(self.__cached()[0])
+
+    def to_json(self):
+        """
+        returns to_dict() encoded as JSON. Outside of db mode the text is
+        cached until an attribute is assigned, so values mutated in place
+        (e.g. appending to a list) must be assigned back to be seen
+        """
+        if models.storage_t == "db":
+            return json.dumps(self.__build_dict())
+        cache = self.__cached()
+        if cache[1] is None:
+            cache[1] = json.dumps(cache[0])
+        return cache[1]
+
+    def __cached(self):
+        """returns the [to_dict(), JSON or None] cache, rebuilt if stale"""
+        cache = getattr(self, "_BaseModel__cache", None)
+        if cache is None:
+            cache = [self.__build_dict(), None]
+            object.__setattr__(self, "_BaseModel__cache", cache)
+        return cache
+
+    def __build_dict(self):
+        """builds the to_dict() of the instance from __dict__"""
         new_dict = self.__dict__.copy()
         if "created_at" in new_dict:
-            new_dict["created_at"] = new_dict["created_at"].strftime(time)
+            new_dict["created_at"] = self.__format("created_at")
         if "updated_at" in new_dict:
-            new_dict["updated_at"] = new_dict["updated_at"].strftime(time)
+            new_dict["updated_at"] = self.__format("updated_at")
         new_dict["__class__"] = self.__class__.__name__
         if "_sa_instance_state" in new_dict:
             del new_dict["_sa_instance_state"]
         return new_dict
 
+    def __format(self, name):
+        """returns the timestamp name formatted, cached until it changes"""
+        value = self.__dict__[name]
+        if models.storage_t == "db":
+            return format_time(value)
+        try:
+            times = self.__times
+        except AttributeError:
+            times = {}
+            object.__setattr__(self, "_BaseModel__times", times)
+        cached = times.get(name)
+        if cached is None or cached[0] is not value:
+            cached = times[name] = (value, format_time(value))
+        return cached[1]
+
     def delete(self):
         """delete the current instance from the storage"""
         models.storage.delete(self)
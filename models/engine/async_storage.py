@@ -0,0 +1,236 @@
+#!/usr/bin/python3
+"""
+Contains the asyncio storages: AsyncDBStorage and AsyncSQLiteStorage on
+SQLAlchemy's async engine, and ThreadedStorage, which runs a synchronous
+storage such as FileStorage in worker threads
+"""
+
+import asyncio
+import models
+from models.base_model import Base
+from models.engine.db_storage import classes, pool_options
+from models.engine.db_storage import records_select, row_records
+from models.engine.sqlite_storage import set_pragmas
+from os import getenv
+import json
+from sqlalchemy import event, func, select
+from sqlalchemy.pool import StaticPool
+try:
+    from sqlalchemy.ext.asyncio import async_scoped_session
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from sqlalchemy.ext.asyncio import create_async_engine
+except ImportError:
+    # SQLAlchemy's asyncio extension needs the greenlet package
+    create_async_engine = None
+
+
+def async_pool_options():
+    """
+    returns pool_options() for an async engine, which picks its own
+    asyncio-adapted pool class
+    """
+    options = pool_options()
+    del options["poolclass"]
+    return options
+
+
+class AsyncDBStorage:
+    """the DBStorage interface as coroutines, on an async engine"""
+    __engine = None
+    __session = None
+
+    def __init__(self):
+        """Instantiate an AsyncDBStorage object"""
+        if create_async_engine is None:
+            raise ImportError("the async storage needs greenlet")
+        self.__engine = self.make_engine()
+        # one session per asyncio task, that is per request
+        self.__session = async_scoped_session(
+            async_sessionmaker(self.__engine, expire_on_commit=False),
+            scopefunc=asyncio.current_task)
+
+    def make_engine(self):
+        """returns the async engine to the MySQL database named in the env"""
+        HBNB_MYSQL_USER = getenv('HBNB_MYSQL_USER')
+        HBNB_MYSQL_PWD = getenv('HBNB_MYSQL_PWD')
+        HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
+        HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
+        return create_async_engine('mysql+aiomysql://{}:{}@{}/{}'.
+                                   format(HBNB_MYSQL_USER,
+                                          HBNB_MYSQL_PWD,
+                                          HBNB_MYSQL_HOST,
+                                          HBNB_MYSQL_DB),
+                                   **async_pool_options())
+
+    async def areload(self):
+        """creates the tables the database lacks"""
+        async with self.__engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    async def aall(self, cls=None):
+        """returns the objects of cls, or of every class, by key"""
+        new_dict = {}
+        for name, clss in classes.items():
+            if cls is None or cls is clss or cls == name:
+                result = await self.__session.execute(select(clss))
+                for obj in result.scalars():
+                    new_dict[name + '.' + obj.id] = obj
+        return new_dict
+
+    async def aget(self, cls, id):
+        """returns the object of cls with that id, None if not found"""
+        if isinstance(cls, str):
+            cls = classes.get(cls)
+        if cls not in classes.values() or id is None:
+            return None
+        return await self.__session.get(cls, id)
+
+    async def acount(self, cls=None):
+        """returns the number of objects of cls, or of every class"""
+        if cls:
+            if isinstance(cls, str):
+                cls = classes.get(cls)
+            if cls not in classes.values():
+                return 0
+            stmt = select(func.count()).select_from(cls)
+            return await self.__session.scalar(stmt)
+        counts = [select(func.count()).select_from(clss).scalar_subquery()
+                  for clss in classes.values()]
+        result = await self.__session.execute(select(*counts))
+        return sum(result.one())
+
+    async def arecords(self, cls, **where):
+        """
+        returns the to_dict() of every object of cls whose columns equal
+        where, built from the rows of a Core select as DBStorage.records
+        """
+        if isinstance(cls, str):
+            cls = classes.get(cls)
+        if cls not in classes.values():
+            return []
+        result = await self.__session.execute(records_select(cls, where))
+        return row_records(cls, result.all())
+
+    async def arecords_json(self, cls, **where):
+        """returns the arecords() of cls matching where encoded as JSON"""
+        return [json.dumps(record)
+                for record in await self.arecords(cls, **where)]
+
+    async def anew(self, obj):
+        """adds the object to the session of the current task"""
+        self.__session.add(obj)
+
+    async def adelete(self, obj=None):
+        """deletes obj from the session of the current task if not None"""
+        if obj is not None:
+            await self.__session.delete(obj)
+
+    async def asave(self):
+        """commits all changes of the session of the current task"""
+        await self.__session.commit()
+
+    async def aclose(self):
+        """closes and forgets the session of the current task"""
+        await self.__session.remove()
+
+    async def adispose(self):
+        """closes every pooled connection of the engine"""
+        await self.__engine.dispose()
+
+    def pool_stats(self):
+        """
+        returns the size of the connection pool, the connections checked
+        in and out and the overflow in use
+        """
+        pool = self.__engine.pool
+        if not hasattr(pool, "checkedout"):
+            return {}
+        return {"size": pool.size(), "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow()}
+
+
+class AsyncSQLiteStorage(AsyncDBStorage):
+    """the async storage on the SQLite file of SQLiteStorage, by aiosqlite"""
+
+    def make_engine(self):
+        """returns the async engine to the SQLite file named in the env"""
+        path = getenv('HBNB_SQLITE_PATH', 'hbnb.db')
+        if path == ":memory:":
+            options = {"poolclass": StaticPool}
+        else:
+            options = async_pool_options()
+        engine = create_async_engine('sqlite+aiosqlite:///' + path,
+                                     **options)
+        event.listen(engine.sync_engine, "connect", set_pragmas)
+        return engine
+
+
+class ThreadedStorage:
+    """
+    the async storage interface over a synchronous storage: each call
+    runs in a worker thread so file I/O never blocks the event loop
+    """
+    # object - the synchronous storage the calls are made on
+    __storage = None
+
+    def __init__(self, storage):
+        """Instantiate a ThreadedStorage over storage"""
+        self.__storage = storage
+
+    async def areload(self):
+        """reloads the storage"""
+        await asyncio.to_thread(self.__storage.reload)
+
+    async def aall(self, cls=None):
+        """returns the objects of cls, or of every class, by key"""
+        return await asyncio.to_thread(self.__storage.all, cls)
+
+    async def aget(self, cls, id):
+        """returns the object of cls with that id, None if not found"""
+        return await asyncio.to_thread(self.__storage.get, cls, id)
+
+    async def acount(self, cls=None):
+        """returns the number of objects of cls, or of every class"""
+        return await asyncio.to_thread(self.__storage.count, cls)
+
+    async def arecords(self, cls, **where):
+        """returns the to_dict() of every object of cls matching where"""
+        return await asyncio.to_thread(self.__storage.records, cls, **where)
+
+    async def arecords_json(self, cls, **where):
+        """returns the to_json() of every object of cls matching where"""
+        return await asyncio.to_thread(self.__storage.records_json, cls,
+                                       **where)
+
+    async def anew(self, obj):
+        """adds the object to the storage"""
+        await asyncio.to_thread(self.__storage.new, obj)
+
+    async def adelete(self, obj=None):
+        """deletes obj from the storage if not None"""
+        await asyncio.to_thread(self.__storage.delete, obj)
+
+    async def asave(self):
+        """saves the changes of the storage"""
+        await asyncio.to_thread(self.__storage.save)
+
+    async def aclose(self):
+        """closes the storage, as the apps do at the end of a request"""
+        await asyncio.to_thread(self.__storage.close)
+
+    async def adispose(self):
+        """nothing to release: the storage outlives the app"""
+
+
+def make_async_storage():
+    """
+    returns the async storage for HBNB_TYPE_STORAGE: the async engine
+    for db and sqlite, models.storage run in threads for file storage
+    """
+    storage_t = getenv("HBNB_TYPE_STORAGE")
+    if storage_t == "sqlite":
+        return AsyncSQLiteStorage()
+    if storage_t == "db":
+        return AsyncDBStorage()
+    return ThreadedStorage(models.storage)
@@ -3,9 +3,11 @@
 Contains the class DBStorage
 """
 
+from datetime import datetime
+import json
 import models
 from models.amenity import Amenity
-from models.base_model import BaseModel, Base
+from models.base_model import BaseModel, Base, format_time, parse_time
 from models.city import City
 from models.place import Place
 from models.review import Review
@@ -13,78 +15,364 @@ from models.state import State
 from models.user import User
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import create_engine, func
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.orm import object_session, scoped_session, selectinload
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+import threading
+import time
+import uuid
 
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
 
+class TimedQueuePool(QueuePool):
+    """a QueuePool that also counts checkouts and the time they waited"""
+
+    def __init__(self, *args, **kwargs):
+        """Instantiate the pool with empty statistics"""
+        super().__init__(*args, **kwargs)
+        self.stats = {"checkouts": 0, "timeouts": 0,
+                      "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+        self.stats_lock = threading.Lock()
+
+    def _do_get(self):
+        """checks a connection out as QueuePool does, timing the wait"""
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self.stats_lock:
+                self.stats["checkouts"] += 1
+                self.stats["timeouts"] += timed_out
+                self.stats["wait_seconds"] += waited
+                if waited > self.stats["max_wait_seconds"]:
+                    self.stats["max_wait_seconds"] = waited
+
+
+def pool_options():
+    """returns the create_engine() connection pool settings from the env"""
+    return {"poolclass": TimedQueuePool,
+            "pool_size": int(getenv('HBNB_DB_POOL_SIZE', '5')),
+            "max_overflow": int(getenv('HBNB_DB_MAX_OVERFLOW', '10')),
+            "pool_timeout": float(getenv('HBNB_DB_POOL_TIMEOUT', '30')),
+            "pool_recycle": int(getenv('HBNB_DB_POOL_RECYCLE', '3600')),
+            "pool_pre_ping": getenv('HBNB_DB_POOL_PRE_PING', '1') != '0'}
+
+
+def records_select(cls, where):
+    """
+    returns the Core select() of every column of the rows of cls whose
+    columns equal where, a dict of column name -> value
+    """
+    table = cls.__table__
+    stmt = sqlalchemy.select(*table.columns)
+    for name, value in where.items():
+        stmt = stmt.where(table.columns[name] == value)
+    return stmt
+
+
+def row_records(cls, rows):
+    """
+    returns the rows of records_select(cls) as the dicts to_dict() would
+    build for their objects, timestamps formatted the same way
+    """
+    keys = [column.key for column in cls.__table__.columns]
+    times = [key for key in keys if key in ("created_at", "updated_at")]
+    name = cls.__name__
+    records = []
+    for row in rows:
+        record = dict(zip(keys, row))
+        for key in times:
+            if record[key] is not None:
+                record[key] = format_time(record[key])
+        record["__class__"] = name
+        records.append(record)
+    return records
+
+
 class DBStorage:
     """interaacts with the MySQL database"""
     __engine = None
     __session = None
+    # engine and session of the read replica, None without one
+    __replica_engine = None
+    __replica = None
+    # thread local - sticky is True once the current request has written
+    __local = None
 
     def __init__(self):
         """Instantiate a DBStorage object"""
-        HBNB_MYSQL_USER = getenv('HBNB_MYSQL_USER')
-        HBNB_MYSQL_PWD = getenv('HBNB_MYSQL_PWD')
-        HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
-        HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
         HBNB_ENV = getenv('HBNB_ENV')
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
-                                      format(HBNB_MYSQL_USER,
-                                             HBNB_MYSQL_PWD,
-                                             HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+        self.__engine = self.make_engine()
+        self.__replica_engine = self.make_replica_engine()
+        self.__local = threading.local()
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
 
-    def all(self, cls=None):
-        """query on the current database session"""
+    def make_engine(self):
+        """returns the engine to the MySQL database named in the env"""
+        return self.__mysql_engine(getenv('HBNB_MYSQL_HOST'))
+
+    def make_replica_engine(self):
+        """
+        returns the engine to the read replica on HBNB_MYSQL_REPLICA_HOST,
+        None when it is not set
+        """
+        HBNB_MYSQL_REPLICA_HOST = getenv('HBNB_MYSQL_REPLICA_HOST')
+        if not HBNB_MYSQL_REPLICA_HOST:
+            return None
+        return self.__mysql_engine(HBNB_MYSQL_REPLICA_HOST)
+
+    @staticmethod
+    def __mysql_engine(host):
+        """returns an engine to the MySQL database named in the env on host"""
+        HBNB_MYSQL_USER = getenv('HBNB_MYSQL_USER')
+        HBNB_MYSQL_PWD = getenv('HBNB_MYSQL_PWD')
+        HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
+        return create_engine('mysql+mysqldb://{}:{}@{}/{}'.
+                             format(HBNB_MYSQL_USER,
+                                    HBNB_MYSQL_PWD,
+                                    host,
+                                    HBNB_MYSQL_DB),
+                             **pool_options())
+
+    def __reader(self):
+        """
+        returns the session for read-only work: the replica's, unless
+        there is none or the current request already wrote, so that it
+        reads its own writes
+        """
+        if self.__replica is None or getattr(self.__local, "sticky", False):
+            return self.__session
+        return self.__replica
+
+    def __writer(self):
+        """returns the primary session and keeps the request's reads on it"""
+        self.__local.sticky = True
+        return self.__session
+
+    def __adopt(self, obj):
+        """moves obj read through the replica session to the primary one"""
+        if self.__replica is not None and object_session(obj) is not None:
+            if object_session(obj) is self.__replica():
+                self.__replica.expunge(obj)
+
+    def pool_stats(self):
+        """
+        returns the size of the connection pool, the connections checked
+        in and out, the overflow in use, and how long checkouts waited
+        """
+        pool = self.__engine.pool
+        if not isinstance(pool, QueuePool):
+            return {}
+        stats = {"size": pool.size(), "checked_in": pool.checkedin(),
+                 "checked_out": pool.checkedout(),
+                 "overflow": pool.overflow()}
+        if isinstance(pool, TimedQueuePool):
+            with pool.stats_lock:
+                stats.update(pool.stats)
+            if stats["checkouts"]:
+                stats["mean_wait_seconds"] = (stats["wait_seconds"] /
+                                              stats["checkouts"])
+        return stats
+
+    def all(self, cls=None, include=()):
+        """
+        query on the current database session. include names the
+        relationships to load along, e.g. ["cities", "cities.places"],
+        in one query each instead of one query per object
+        """
         new_dict = {}
         for clss in classes:
             if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
+                query = self.__reader().query(classes[clss])
+                options = self.__load_options(classes[clss], include)
+                objs = query.options(*options).all()
                 for obj in objs:
                     key = obj.__class__.__name__ + '.' + obj.id
                     new_dict[key] = obj
         return (new_dict)
 
+    def records(self, cls, **where):
+        """
+        returns the to_dict() of every object of cls whose columns equal
+        where, e.g. records(City, state_id=id). The dicts are built
+        straight from the rows of a Core select of the columns: no object
+        is created, tracked in the session or copied out of __dict__.
+        """
+        if isinstance(cls, str):
+            cls = classes.get(cls)
+        if cls not in classes.values():
+            return []
+        rows = self.__reader().execute(records_select(cls, where)).all()
+        return row_records(cls, rows)
+
+    def records_json(self, cls, **where):
+        """returns the records() of cls matching where encoded as JSON"""
+        return [json.dumps(record) for record in self.records(cls, **where)]
+
     def new(self, obj):
         """add the object to the current database session"""
-        self.__session.add(obj)
+        self.__adopt(obj)
+        self.__writer().add(obj)
+
+    def new_many(self, objs):
+        """add every obj of objs to the current database session"""
+        for obj in objs:
+            self.__adopt(obj)
+        self.__writer().add_all(objs)
+
+    def bulk_upsert(self, cls, records):
+        """
+        inserts a row of cls per record (a to_dict() like dict), or
+        updates the row with the same id keeping its created_at. Records
+        with the same keys share one executemany of an upsert statement.
+        """
+        if isinstance(cls, str):
+            cls = classes[cls]
+        table = cls.__table__
+        now = datetime.utcnow()
+        groups = {}
+        for record in records:
+            row = {key: value for key, value in record.items()
+                   if key in table.columns}
+            row.setdefault("id", str(uuid.uuid4()))
+            row.setdefault("updated_at", now)
+            for name in ("created_at", "updated_at"):
+                if isinstance(row.get(name), str):
+                    row[name] = parse_time(row[name])
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        session = self.__writer()
+        for keys, rows in groups.items():
+            session.execute(self.__upsert(table, keys), rows)
+        session.commit()
+        session.expire_all()
+
+    def __upsert(self, table, keys):
+        """
+        returns the INSERT of the columns keys into table that updates
+        the row instead when the id is taken, in the engine's dialect
+        """
+        update = [key for key in keys if key not in ("id", "created_at")]
+        if self.__engine.dialect.name == "mysql":
+            stmt = mysql.insert(table)
+            return stmt.on_duplicate_key_update(
+                {key: stmt.inserted[key] for key in update})
+        stmt = sqlite.insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={key: stmt.excluded[key] for key in update})
 
     def save(self):
         """commit all changes of the current database session"""
-        self.__session.commit()
+        self.__writer().commit()
 
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
         if obj is not None:
-            self.__session.delete(obj)
+            self.__adopt(obj)
+            self.__writer().delete(obj)
 
     def reload(self):
         """reloads data from the database"""
         Base.metadata.create_all(self.__engine)
+        self.create_indexes()
         sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
         Session = scoped_session(sess_factory)
         self.__session = Session
+        if self.__replica_engine is not None:
+            self.__replica = scoped_session(sessionmaker(
+                bind=self.__replica_engine, expire_on_commit=False))
+
+    def create_indexes(self):
+        """
+        creates the indexes the models declare that the database lacks:
+        create_all() only builds them along with a table it creates
+        """
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.__engine, checkfirst=True)
 
     def close(self):
-        """call remove() method on the private session attribute"""
+        """
+        call remove() method on the private session attributes; the
+        next request reads from the replica again until it writes
+        """
         self.__session.remove()
+        if self.__replica is not None:
+            self.__replica.remove()
+        self.__local.sticky = False
 
-    def get(self, cls, id):
+    def get(self, cls, id, include=()):
         """
         A method to retrieve one object. Returns the object based
-        on the class and its ID, or None if not found
+        on the class and its ID, or None if not found; include is
+        the relationships to load along, as for all()
+        """
+        if isinstance(cls, str):
+            cls = classes.get(cls)
+        if cls not in classes.values() or id is None:
+            return None
+        options = self.__load_options(cls, include)
+        return self.__reader().get(cls, id, options=options)
+
+    def iter(self, cls, batch_size=1000, after_id=None):
+        """
+        yields the objects of cls in id order, starting after after_id.
+        Each batch is one keyset query (id > last id seen, LIMIT
+        batch_size) streamed with yield_per, so no query skips or sorts
+        through the rows of the pages before it.
+        """
+        if isinstance(cls, str):
+            cls = classes.get(cls)
+        if cls not in classes.values():
+            return
+        session = self.__reader()
+        while True:
+            query = session.query(cls)
+            if after_id is not None:
+                query = query.filter(cls.id > after_id)
+            query = query.order_by(cls.id).limit(batch_size)
+            count = 0
+            for obj in query.yield_per(batch_size):
+                count += 1
+                after_id = obj.id
+                yield obj
+            if count < batch_size:
+                return
+
+    @staticmethod
+    def __load_options(cls, include):
+        """
+        returns the selectinload() options for the relationship paths in
+        include that start on cls; "a.b" loads b of every loaded a too
         """
-        for obj in self.all(cls).values():
-            if obj.id == id:
-                return obj
-        return None
+        options = []
+        for path in include:
+            option = None
+            target = cls
+            for name in path.split("."):
+                attr = getattr(target, name, None)
+                if attr is None:
+                    break
+                if option is None:
+                    option = selectinload(attr)
+                else:
+                    option = option.selectinload(attr)
+                target = attr.property.mapper.class_
+            if option is not None:
+                options.append(option)
+        return options
 
     def count(self, cls=None):
         """
@@ -92,7 +380,13 @@ class DBStorage:
         the number of objects in storage matching the given class name.
         If no class is passed, returns the count of all objects in storage.
         """
+        session = self.__reader()
         if cls:
-            return len(self.all(cls))
-        else:
-            return len(self.all())
+            if isinstance(cls, str):
+                cls = classes.get(cls)
+            if cls not in classes.values():
+                return 0
+            return session.query(func.count()).select_from(cls).scalar()
+        counts = [session.query(func.count()).select_from(clss)
+                  .scalar_subquery() for clss in classes.values()]
+        return sum(session.query(*counts).one())
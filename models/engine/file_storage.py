@@ -3,82 +3,770 @@
 Contains the FileStorage class
 """
 
+import atexit
+from contextlib import contextmanager
 import json
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
+from models.engine.snapshot import get_codec
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+import os
+from os import getenv
+import threading
+import time
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
+# the attributes FileStorage.related() can look objects up by
+foreign_keys = {"City": ("state_id",), "Place": ("city_id", "user_id"),
+                "Review": ("place_id", "user_id")}
+
+
+class CommitHandle:
+    """returned by FileStorage.save() to wait until the save is written"""
+
+    def __init__(self):
+        """initializes a handle for a commit that is not written yet"""
+        self.__event = threading.Event()
+        self.error = None
+
+    def finish(self, error=None):
+        """marks the commit as written, or as failed with error"""
+        self.error = error
+        self.__event.set()
+
+    def done(self):
+        """returns True once the commit has been written or has failed"""
+        return self.__event.is_set()
+
+    def wait(self, timeout=None):
+        """blocks until the commit is written, False if timeout expires"""
+        if not self.__event.wait(timeout):
+            return False
+        if self.error is not None:
+            raise self.error
+        return True
 
 
 class FileStorage:
     """serializes instances to a JSON file & deserializes back to instances"""
 
-    # string - path to the JSON file
-    __file_path = "file.json"
+    # string - snapshot format: "json", "pickle", "marshal", "msgpack"
+    # or "mmap"
+    __codec = getenv("HBNB_FILE_CODEC", "json")
+    # string - path to the JSON file (or snapshot in another format)
+    __file_path = "file." + get_codec(__codec).extension
     # dictionary - empty but will store all objects by <class name>.id
     __objects = {}
+    # dictionary - per-class buckets of __objects: <class name> -> {key: obj}
+    __classes = {}
+    # tuple - stamps of the JSON file and journal as last read or written
+    __stamp = None
+    # int - generation of the files as last read or written by this process
+    __generation = None
+    # int - bytes at the start of the journal already applied
+    __journal_offset = 0
+    # int - descriptor of the lock file while this process holds the lock
+    __flock_fd = None
+    # lock - makes concurrent reloads parse a changed file only once
+    __reload_lock = threading.Lock()
+    # bool - append changes to a journal instead of rewriting the JSON file
+    __journal = getenv("HBNB_FILE_JOURNAL") == "1"
+    # int - journal records to accumulate before folding them into the file
+    __checkpoint_every = int(getenv("HBNB_FILE_CHECKPOINT", "1000"))
+    # int - records currently in the journal
+    __journal_records = 0
+    # set - keys created, updated or deleted since the last save
+    __dirty = set()
+    # float - seconds saves wait to share one write, 0 writes every save
+    __commit_window = float(getenv("HBNB_FILE_COMMIT_WINDOW", "0")) / 1000
+    # int - pending saves that force the shared write before the window ends
+    __commit_batch = int(getenv("HBNB_FILE_COMMIT_BATCH", "100"))
+    # string - fsync after each "commit", once per "batch", or "none"
+    __fsync = getenv("HBNB_FILE_FSYNC", "none")
+    # lock - serializes writes and guards the pending group commit
+    __commit_lock = threading.RLock()
+    # CommitHandle - shared by the saves waiting for the next group commit
+    __pending = None
+    # int - saves waiting for the next group commit
+    __pending_count = 0
+    # Timer - writes the pending group commit when the window ends
+    __timer = None
+    # int - objects loaded between two calls of the reload() progress hook
+    __progress_every = 10000
+    # dictionary - objects, bytes and seconds taken by the last file load
+    __load_stats = {}
+    # bool - keep loaded records raw until an object is first asked for
+    __lazy = getenv("HBNB_FILE_LAZY") == "1"
+    # dictionary - records not built yet: <class name> -> {key: record},
+    # where a record mapped from an mmap snapshot is (snapshot, offset, size)
+    __raw = {}
+    # lock - guards every change to __objects, __classes, __raw, __fk and
+    # __dirty; held for in-memory steps only, never while writing a file
+    __lock = threading.RLock()
+    # dictionary - (<class name>, <attribute>) -> {value: set of keys},
+    # built on the first related() lookup and kept up to date after that
+    __fk = {}
 
-    def all(self, cls=None):
-        """returns the dictionary __objects"""
+    def all(self, cls=None, include=()):
+        """
+        returns the dictionary __objects, or a copy of one class bucket.
+        __objects itself changes under concurrent writers, so threads
+        should iterate a class bucket or take a copy. include is taken
+        for DBStorage compatibility: relationships here are indexed.
+        """
         if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            self.__materialize(cls)
+            return dict(self.__classes.get(cls, {}))
+        for name in list(self.__raw):
+            self.__materialize(name)
         return self.__objects
 
+    def records(self, cls, **where):
+        """
+        returns the to_dict() of every object of cls whose attributes
+        equal where, e.g. records(City, state_id=id); records that were
+        never built into objects are copied as they were loaded
+        """
+        objs, raw = self.__select(cls, where)
+        return ([obj.to_dict() for obj in objs] +
+                [dict(self.__record(value)) for value in raw])
+
+    def records_json(self, cls, **where):
+        """
+        returns the to_json() of every object of cls matching where,
+        reusing the text cached on objects that did not change since it
+        was encoded
+        """
+        objs, raw = self.__select(cls, where)
+        return ([obj.to_json() for obj in objs] +
+                [json.dumps(self.__record(value)) for value in raw])
+
+    def __select(self, cls, where):
+        """
+        returns the objects and the raw records of cls matching where;
+        a foreign key condition is looked up in its related() index,
+        anything else scans the class
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        indexed = [name for name in where if name in foreign_keys.get(cls, ())]
+        if indexed:
+            objs = self.related(cls, indexed[0], where[indexed[0]])
+            raw = []
+        else:
+            with self.__lock:
+                objs = list(self.__classes.get(cls, {}).values())
+                raw = list(self.__raw.get(cls, {}).values())
+        if where:
+            defaults = classes[cls]
+            objs = [obj for obj in objs
+                    if all(getattr(obj, name) == value
+                           for name, value in where.items())]
+            raw = [item for item in raw
+                   if all(self.__record(item).get(
+                       name, getattr(defaults, name, None)) == value
+                       for name, value in where.items())]
+        return objs, raw
+
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
             key = obj.__class__.__name__ + "." + obj.id
-            self.__objects[key] = obj
+            with self.__lock:
+                self.__discard(key)
+                self.__put(key, obj)
+                self.__dirty.add(key)
+
+    def new_many(self, objs):
+        """sets in __objects every obj of objs under one lock acquisition"""
+        with self.__lock:
+            for obj in objs:
+                key = obj.__class__.__name__ + "." + obj.id
+                self.__discard(key)
+                self.__put(key, obj)
+                self.__dirty.add(key)
+
+    def bulk_upsert(self, cls, records):
+        """
+        creates an object of cls per record (a to_dict() like dict), or
+        replaces the stored one with the same id keeping its created_at,
+        then saves them all in one write; returns what save() returns
+        """
+        if isinstance(cls, str):
+            cls = classes[cls]
+        objs = []
+        for record in records:
+            old = self.get(cls, record["id"]) if "id" in record else None
+            if old is not None:
+                merged = old.to_dict()
+                del merged["updated_at"]
+                merged.update(record)
+                record = merged
+            objs.append(cls(**record))
+        self.new_many(objs)
+        return self.save()
+
+    def __put(self, key, obj):
+        """
+        stores obj under key in __objects and its class bucket;
+        the caller holds __lock
+        """
+        cls = obj.__class__.__name__
+        if self.__fk and cls in foreign_keys:
+            old = self.__objects.get(key)
+            if old is not None:
+                self.__fk_update(cls, key, old.__dict__, False)
+            self.__fk_update(cls, key, obj.__dict__, True)
+        self.__objects[key] = obj
+        self.__classes.setdefault(cls, {})[key] = obj
+
+    def __discard(self, key):
+        """
+        removes key from __objects and its class bucket if present;
+        the caller holds __lock
+        """
+        cls = key.split(".", 1)[0]
+        obj = self.__objects.pop(key, None)
+        if obj is not None:
+            del self.__classes[cls][key]
+            if self.__fk and cls in foreign_keys:
+                self.__fk_update(cls, key, obj.__dict__, False)
+        value = self.__raw.get(cls, {}).pop(key, None)
+        if value is not None and self.__fk and cls in foreign_keys:
+            self.__fk_update(cls, key, self.__record(value), False)
+
+    def __fk_update(self, cls, key, attributes, add):
+        """adds or removes key in the built foreign key indexes of cls"""
+        for name in foreign_keys[cls]:
+            index = self.__fk.get((cls, name))
+            if index is None:
+                continue
+            value = attributes.get(name)
+            if add:
+                index.setdefault(value, set()).add(key)
+            elif value in index:
+                index[value].discard(key)
+
+    def related(self, cls, name, value):
+        """
+        returns the objects of cls whose foreign key attribute name equals
+        value, through an index instead of a scan of the whole class
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        index = self.__fk.get((cls, name))
+        if index is None:
+            index = self.__build_fk(cls, name)
+        objs = []
+        for key in list(index.get(value, ())):
+            self.__materialize(cls, key)
+            obj = self.__objects.get(key)
+            if obj is not None:
+                objs.append(obj)
+        return objs
+
+    def __build_fk(self, cls, name):
+        """
+        indexes the objects and raw records of cls by attribute name; only
+        the foreign_keys indexes, which changes keep current, are kept
+        """
+        with self.__lock:
+            index = {}
+            for key, obj in list(self.__classes.get(cls, {}).items()):
+                index.setdefault(getattr(obj, name), set()).add(key)
+            for key, value in list(self.__raw.get(cls, {}).items()):
+                record = self.__record(value)
+                index.setdefault(record.get(name), set()).add(key)
+            if name in foreign_keys.get(cls, ()):
+                self.__fk[(cls, name)] = index
+        return index
+
+    def reindex(self, obj, name, old):
+        """moves obj in the index of attribute name after it changed"""
+        cls = obj.__class__.__name__
+        index = self.__fk.get((cls, name))
+        if index is None:
+            return
+        key = "{}.{}".format(cls, obj.__dict__.get("id"))
+        with self.__lock:
+            if self.__objects.get(key) is not obj:
+                return
+            if old in index:
+                index[old].discard(key)
+            index.setdefault(getattr(obj, name), set()).add(key)
+
+    def touch(self, obj):
+        """marks obj changed for the next save() if it is the stored one"""
+        key = "{}.{}".format(obj.__class__.__name__, obj.__dict__.get("id"))
+        if self.__objects.get(key) is not obj:
+            return
+        with self.__lock:
+            if self.__objects.get(key) is obj:
+                self.__dirty.add(key)
+
+    def __load(self, key, record):
+        """stores a record read from disk, raw in lazy mode or as an object"""
+        if self.__lazy:
+            self.__stash(record["__class__"], key, record)
+        else:
+            obj = classes[record["__class__"]](**record)
+            with self.__lock:
+                self.__put(key, obj)
+
+    def __stash(self, cls, key, value):
+        """keeps a raw record (or mapped record) of cls to build later"""
+        with self.__lock:
+            self.__discard(key)
+            self.__raw.setdefault(cls, {})[key] = value
+            if self.__fk and cls in foreign_keys:
+                self.__fk_update(cls, key, self.__record(value), True)
+
+    @staticmethod
+    def __record(value):
+        """returns the record dict of a raw value, decoding mapped ones"""
+        if isinstance(value, tuple):
+            snapshot, offset, length = value
+            return snapshot.record(offset, length)
+        return value
+
+    def __materialize(self, cls, key=None):
+        """builds the objects still held as raw records for cls (or key)"""
+        raw = self.__raw.get(cls)
+        if not raw or (key is not None and key not in raw):
+            return
+        keys = list(raw) if key is None else [key]
+        with self.__lock:
+            for key in keys:
+                value = raw.pop(key, None)
+                if value is not None:
+                    record = self.__record(value)
+                    self.__put(key, classes[record["__class__"]](**record))
 
     def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
-        json_objects = {}
-        for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict()
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
-
-    def reload(self):
-        """deserializes the JSON file to __objects"""
+        """
+        serializes changes to the journal, or __objects to the JSON file.
+        With a commit window, saves arriving together share one write.
+        Returns a CommitHandle to wait on for the write to finish.
+        """
+        if not self.__commit_window or self.__fsync == "commit":
+            handle = CommitHandle()
+            with self.__commit_lock:
+                self.__commit()
+            handle.finish()
+            return handle
+        with self.__commit_lock:
+            if self.__pending is None:
+                FileStorage.__pending = CommitHandle()
+                FileStorage.__pending_count = 0
+                FileStorage.__timer = threading.Timer(self.__commit_window,
+                                                      self.flush)
+                FileStorage.__timer.daemon = True
+                FileStorage.__timer.start()
+            handle = self.__pending
+            FileStorage.__pending_count += 1
+            if self.__pending_count >= self.__commit_batch:
+                self.flush()
+        return handle
+
+    def flush(self):
+        """writes the pending group commit now and wakes up its waiters"""
+        with self.__commit_lock:
+            handle = self.__pending
+            if handle is None:
+                return
+            FileStorage.__pending = None
+            self.__timer.cancel()
+            try:
+                self.__commit()
+            except Exception as error:
+                handle.finish(error)
+                raise
+        handle.finish()
+
+    def __commit(self):
+        """writes the changes to the journal or the whole JSON file"""
+        with self.__file_lock():
+            if self.__journal:
+                self.__append_journal()
+                if self.__journal_records >= self.__checkpoint_every:
+                    self.checkpoint()
+            else:
+                self.checkpoint()
+
+    @contextmanager
+    def __file_lock(self):
+        """
+        holds the advisory lock every process takes before writing the
+        files, after catching up with what other processes wrote.
+        Nests within the thread holding __commit_lock.
+        """
+        with self.__commit_lock:
+            if self.__flock_fd is not None:
+                yield
+                return
+            fd = os.open(self.__lock_path(), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                FileStorage.__flock_fd = fd
+                if self.__read_generation(fd) != self.__generation:
+                    with self.__lock:
+                        keep = set(self.__dirty)
+                    self.__refresh(keep=keep)
+                yield
+            finally:
+                FileStorage.__flock_fd = None
+                os.close(fd)
+
+    def __bump(self):
+        """advances the generation in the held lock file after a write"""
+        fd = self.__flock_fd
+        generation = self.__read_generation(fd) + 1
+        os.pwrite(fd, b"%020d" % generation, 0)
+        FileStorage.__generation = generation
+
+    @staticmethod
+    def __read_generation(fd):
+        """returns the generation stored in the lock file fd"""
+        return int(os.pread(fd, 20, 0) or 0)
+
+    def generation(self):
+        """
+        returns the change generation of the files on disk, which every
+        process advances on each write: a cheap value to poll for changes
+        """
         try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
-            for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
+            fd = os.open(self.__lock_path(), os.O_RDONLY)
         except FileNotFoundError:
-            pass
+            return 0
+        try:
+            return self.__read_generation(fd)
+        finally:
+            os.close(fd)
+
+    def __sync(self, f):
+        """flushes f to the disk unless durability is turned off"""
+        if self.__fsync != "none":
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __sync_dir(self):
+        """
+        flushes the directory of the files to the disk unless durability
+        is turned off, so a file created, replaced or removed in it stays
+        that way after a crash
+        """
+        if self.__fsync == "none" or not hasattr(os, "O_DIRECTORY"):
+            return
+        path = os.path.dirname(os.path.abspath(self.__file_path))
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def checkpoint(self):
+        """writes all of __objects to the JSON file and empties the journal"""
+        with self.__file_lock():
+            codec = get_codec(self.__codec)
+            with self.__lock:
+                FileStorage.__dirty = set()
+                entries = self.__entries(getattr(codec, "encoded", False))
+            tmp_path = self.__file_path + ".tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    codec.dump(entries, f)
+                    self.__sync(f)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            # a reload between the replace and the new stamp would parse
+            # the file just written back over objects changed since
+            with self.__reload_lock:
+                os.replace(tmp_path, self.__file_path)
+                try:
+                    os.remove(self.__journal_path())
+                except FileNotFoundError:
+                    pass
+                FileStorage.__journal_records = 0
+                FileStorage.__journal_offset = 0
+                FileStorage.__stamp = self.__stamps()
+            self.__sync_dir()
+            self.__bump()
+
+    def __entries(self, encoded=False):
+        """
+        takes a snapshot of the stored objects and raw records, then
+        returns a generator of the (key, to_dict()) pair of each, encoded
+        one at a time; when encoded, objects give their cached to_json()
+        text instead. Only the snapshot needs __lock, not the encoding.
+        """
+        objs = list(self.__objects.items())
+        raws = [item for raw in self.__raw.values() for item in raw.items()]
+
+        def encode():
+            """yields the snapshot entries, encoding objects on the way"""
+            for key, obj in objs:
+                yield key, obj.to_json() if encoded else obj.to_dict()
+            for key, value in raws:
+                yield key, self.__record(value)
+        return encode()
+
+    def __append_journal(self):
+        """appends one record per dirty key to the journal"""
+        with self.__lock:
+            dirty = [(key, self.__objects.get(key)) for key in self.__dirty]
+            FileStorage.__dirty = set()
+        lines = []
+        for key, obj in dirty:
+            if obj is None:
+                lines.append('{"key":%s}\n' % json.dumps(key))
+            else:
+                lines.append('{"key":%s,"value":%s}\n' %
+                             (json.dumps(key), obj.to_json()))
+        with self.__reload_lock:
+            if lines:
+                created = not os.path.exists(self.__journal_path())
+                with open(self.__journal_path(), 'ab') as f:
+                    if f.tell() > self.__journal_offset:
+                        # the file lock is held and the journal replayed,
+                        # so what follows the last record is a torn write
+                        f.truncate(self.__journal_offset)
+                    f.write("".join(lines).encode())
+                    self.__sync(f)
+                    FileStorage.__journal_offset = f.tell()
+                if created:
+                    self.__sync_dir()
+                FileStorage.__journal_records += len(lines)
+            FileStorage.__stamp = self.__stamps()
+        if lines:
+            self.__bump()
+
+    def reload(self, progress=None):
+        """
+        deserializes the JSON file and journal if they changed on disk.
+        Entries are hydrated one at a time as they are parsed; progress,
+        if given, is called with the load_stats() every few thousand.
+        """
+        if self.__stamps() == self.__stamp:
+            return
+        # changes not written yet, e.g. waiting for a group commit
+        with self.__lock:
+            keep = set(self.__dirty)
+        self.__refresh(progress, keep)
+        if progress:
+            progress(self.load_stats())
+
+    def __refresh(self, progress=None, keep=()):
+        """
+        catches up with the files on disk, leaving the keys in keep alone.
+        When only the journal grew, just the appended records are read;
+        otherwise the whole file is, and objects no longer on disk drop.
+        """
+        with self.__reload_lock:
+            stamp = self.__stamps()
+            old = self.__stamp
+            if stamp == old:
+                return
+            if old is not None and stamp[0] == old[0] and stamp[1]:
+                same = old[1] is not None and old[1][0] == stamp[1][0]
+                offset = self.__journal_offset if same else 0
+                self.__replay_journal(offset, keep)
+                FileStorage.__stamp = stamp
+                return
+            seen = set()
+            start = time.perf_counter()
+            count = 0
+            try:
+                with open(self.__file_path, 'rb') as f:
+                    codec = get_codec(self.__codec)
+                    if self.__lazy and hasattr(codec, "open"):
+                        count = self.__map_snapshot(codec.open(f), seen, keep)
+                        f.seek(0, os.SEEK_END)
+                        entries = ()
+                    else:
+                        entries = codec.load(f)
+                    for key, value in entries:
+                        seen.add(key)
+                        if key not in keep:
+                            self.__load(key, value)
+                        count += 1
+                        if progress and count % self.__progress_every == 0:
+                            self.__record_load(count, f, start)
+                            progress(self.load_stats())
+                    self.__record_load(count, f, start)
+            except FileNotFoundError:
+                pass
+            seen.update(self.__replay_journal(0, keep))
+            if old is not None:
+                self.__prune(seen.union(keep))
+            FileStorage.__stamp = stamp
+
+    def __prune(self, keys):
+        """
+        drops the objects and raw records whose key is not in keys, but
+        none changed since the last save, even during the reload
+        """
+        with self.__lock:
+            stored = list(self.__objects)
+            for raw in self.__raw.values():
+                stored.extend(raw)
+            for key in stored:
+                if key not in keys and key not in self.__dirty:
+                    self.__discard(key)
+
+    def __map_snapshot(self, snapshot, seen, keep=()):
+        """stashes every record of a mapped snapshot without decoding it"""
+        count = 0
+        for cls, index in snapshot.index.items():
+            for key, (offset, length) in index.items():
+                seen.add(key)
+                if key not in keep:
+                    self.__stash(cls, key, (snapshot, offset, length))
+            count += len(index)
+        return count
+
+    def __record_load(self, count, f, start):
+        """stores the progress of the file load for load_stats()"""
+        FileStorage.__load_stats = {"objects": count,
+                                    "bytes": f.tell(),
+                                    "seconds": time.perf_counter() - start}
+
+    def load_stats(self):
+        """
+        returns the objects and bytes read by the last load of the JSON
+        file, how long it took, and the resulting objects per second
+        """
+        stats = dict(self.__load_stats)
+        if stats.get("seconds"):
+            stats["objects_per_second"] = stats["objects"] / stats["seconds"]
+        return stats
+
+    def __replay_journal(self, offset=0, keep=()):
+        """
+        applies the journal records from byte offset on top of the loaded
+        JSON file, except those of the keys in keep; returns the keys
+        still present after the records read
+        """
+        present = set()
+        count = self.__journal_records if offset else 0
+        try:
+            with open(self.__journal_path(), 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # a torn final record from an interrupted append
+                        break
+                    if not line.endswith(b"\n"):
+                        # a record still being appended by another process
+                        break
+                    offset += len(line)
+                    count += 1
+                    key = record["key"]
+                    value = record.get("value")
+                    if value is None:
+                        present.discard(key)
+                    else:
+                        present.add(key)
+                    if key in keep:
+                        continue
+                    if value is None:
+                        with self.__lock:
+                            self.__discard(key)
+                    else:
+                        self.__load(key, value)
+        except FileNotFoundError:
+            offset = 0
+        FileStorage.__journal_records = count
+        FileStorage.__journal_offset = offset
+        return present
+
+    def __journal_path(self):
+        """returns the path of the journal next to the JSON file"""
+        return self.__file_path + ".journal"
+
+    def __lock_path(self):
+        """returns the path of the lock file next to the JSON file"""
+        return self.__file_path + ".lock"
+
+    def __stamps(self):
+        """returns the stamps of the JSON file and of the journal"""
+        return (self.__file_stamp(self.__file_path),
+                self.__file_stamp(self.__journal_path()))
+
+    @staticmethod
+    def __file_stamp(path):
+        """returns the (inode, size, mtime) of a file, None if absent"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
 
     def delete(self, obj=None):
-        """Delete obj from __objects if it’s inside - if obj is equal to None, the method should not do anything"""
+        """delete obj from __objects if it's inside, does nothing if None"""
         if obj is not None:
             key = obj.__class__.__name__ + '.' + obj.id
-            if key in self.__objects:
-                del self.__objects[key]
+            with self.__lock:
+                if key in self.__objects:
+                    self.__discard(key)
+                    self.__dirty.add(key)
 
     def close(self):
-        """call reload() method for deserializing the JSON file to objects"""
+        """call reload() to pick up changes made to the JSON file on disk"""
         self.reload()
 
-    def get(self, cls, id):
+    def get(self, cls, id, include=()):
         """
         A method to retrieve one object. Returns the object based
-        on the class and its ID, or None if not found
+        on the class and its ID, or None if not found; include is
+        taken for DBStorage compatibility
         """
-        for obj in self.all(cls).values():
-            if obj.id == id:
-                return obj
-        return None
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        key = "{}.{}".format(cls, id)
+        self.__materialize(cls, key)
+        return self.__classes.get(cls, {}).get(key)
+
+    def iter(self, cls, batch_size=1000, after_id=None):
+        """
+        yields the objects of cls in id order, starting after after_id.
+        Raw records are built batch_size at a time as the caller reaches
+        them, so a caller can page or stream without loading the class.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        prefix = cls + "."
+        with self.__lock:
+            keys = (list(self.__classes.get(cls, {})) +
+                    list(self.__raw.get(cls, {})))
+        if after_id is not None:
+            keys = [key for key in keys if key > prefix + after_id]
+        keys.sort()
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            with self.__lock:
+                for key in batch:
+                    self.__materialize(cls, key)
+                bucket = self.__classes.get(cls, {})
+                objs = [bucket.get(key) for key in batch]
+            for obj in objs:
+                if obj is not None:
+                    yield obj
 
     def count(self, cls=None):
         """
@@ -87,6 +775,12 @@ class FileStorage:
         If no class is passed, returns the count of all objects in storage.
         """
         if cls:
-            return len(self.all(cls))
-        else:
-            return len(self.all())
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            return (len(self.__classes.get(cls, {})) +
+                    len(self.__raw.get(cls, {})))
+        return (len(self.__objects) +
+                sum(len(raw) for raw in list(self.__raw.values())))
+
+
+atexit.register(FileStorage().flush)
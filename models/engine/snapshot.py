@@ -0,0 +1,263 @@
+#!/usr/bin/python3
+"""
+Contains the snapshot formats FileStorage can write its objects in.
+It imports nothing from models, so convert_snapshot.py can load it alone
+"""
+
+import codecs
+import json
+import marshal
+import mmap
+import os
+import pickle
+import struct
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class EntryReader:
+    """iterates over the entries of a JSON object without loading it whole"""
+
+    def __init__(self, f, chunk_size=1 << 16):
+        """reads the JSON object from the binary file f, chunk by chunk"""
+        self.f = f
+        self.chunk_size = chunk_size
+        self.__decoder = json.JSONDecoder()
+        self.__utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.__buf = ""
+        self.__pos = 0
+        self.__eof = False
+
+    def __iter__(self):
+        """yields the (key, value) pairs of the object one at a time"""
+        self.__expect("{")
+        if self.__next_char() == "}":
+            return
+        while True:
+            key = self.__value()
+            self.__expect(":")
+            yield key, self.__value()
+            char = self.__next_char()
+            self.__pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError("expected ',' or '}' in the JSON object")
+
+    def __fill(self):
+        """drops the text already consumed and reads the next chunk"""
+        chunk = self.f.read(self.chunk_size)
+        self.__eof = not chunk
+        self.__buf = (self.__buf[self.__pos:] +
+                      self.__utf8.decode(chunk, self.__eof))
+        self.__pos = 0
+
+    def __next_char(self):
+        """skips whitespace and returns the next character, '' at the end"""
+        while True:
+            while (self.__pos < len(self.__buf) and
+                   self.__buf[self.__pos] in " \t\n\r"):
+                self.__pos += 1
+            if self.__pos < len(self.__buf):
+                return self.__buf[self.__pos]
+            if self.__eof:
+                return ""
+            self.__fill()
+
+    def __expect(self, char):
+        """consumes char or raises ValueError"""
+        if self.__next_char() != char:
+            raise ValueError("expected {!r} in the JSON object".format(char))
+        self.__pos += 1
+
+    def __value(self):
+        """decodes the next value, reading more until it is complete"""
+        self.__next_char()
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buf, self.__pos)
+                if end < len(self.__buf) or self.__eof:
+                    self.__pos = end
+                    return value
+            except ValueError:
+                if self.__eof:
+                    raise
+            self.__fill()
+
+
+class JSONCodec:
+    """the original file.json layout: one JSON object of <class>.<id>"""
+    name = "json"
+    extension = "json"
+    # bool - dump() also takes records already encoded as JSON text
+    encoded = True
+
+    def dump(self, entries, f):
+        """writes the (key, record) pairs to the binary file f"""
+        separator = b"{"
+        for key, record in entries:
+            if not isinstance(record, str):
+                record = json.dumps(record)
+            f.write(separator)
+            f.write(json.dumps(key).encode())
+            f.write(b": ")
+            f.write(record.encode())
+            separator = b", "
+        f.write(b"{}" if separator == b"{" else b"}")
+
+    def load(self, f):
+        """yields the (key, record) pairs read from the binary file f"""
+        return iter(EntryReader(f))
+
+
+class PickleCodec:
+    """
+    a stream of pickled (key, record) pairs.
+    Only load snapshots you wrote yourself: unpickling can run code.
+    """
+    name = "pickle"
+    extension = "pickle"
+
+    def dump(self, entries, f):
+        """writes the (key, record) pairs to the binary file f"""
+        for entry in entries:
+            f.write(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+
+    def load(self, f):
+        """yields the (key, record) pairs read from the binary file f"""
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+class MarshalCodec:
+    """
+    a stream of length-prefixed marshalled (key, record) pairs, fast but
+    tied to the Python version that wrote it
+    """
+    name = "marshal"
+    extension = "marshal"
+    length = struct.Struct("<I")
+
+    def dump(self, entries, f):
+        """writes the (key, record) pairs to the binary file f"""
+        for entry in entries:
+            data = marshal.dumps(entry)
+            f.write(self.length.pack(len(data)))
+            f.write(data)
+
+    def load(self, f):
+        """yields the (key, record) pairs read from the binary file f"""
+        while True:
+            header = f.read(self.length.size)
+            if not header:
+                return
+            size, = self.length.unpack(header)
+            data = f.read(size)
+            if len(data) != size:
+                raise ValueError("truncated marshal snapshot")
+            yield marshal.loads(data)
+
+
+class MsgpackCodec:
+    """a stream of msgpack (key, record) pairs, needs the msgpack package"""
+    name = "msgpack"
+    extension = "msgpack"
+
+    def __init__(self):
+        """checks that msgpack is installed"""
+        if msgpack is None:
+            raise ImportError("the msgpack snapshot format needs msgpack")
+
+    def dump(self, entries, f):
+        """writes the (key, record) pairs to the binary file f"""
+        packer = msgpack.Packer()
+        for entry in entries:
+            f.write(packer.pack(entry))
+
+    def load(self, f):
+        """yields the (key, record) pairs read from the binary file f"""
+        for key, record in msgpack.Unpacker(f, raw=False):
+            yield key, record
+
+
+class MappedCodec:
+    """
+    a header, each record as compact JSON, then a JSON index of
+    <class> -> {<key>: [offset, length]} so open() can map the file and
+    decode single records on demand
+    """
+    name = "mmap"
+    extension = "hbnb"
+    magic = b"HBNBMAP1"
+    header = struct.Struct("<8sQQ")
+
+    def dump(self, entries, f):
+        """writes the (key, record) pairs to the seekable binary file f"""
+        f.write(self.header.pack(self.magic, 0, 0))
+        offset = self.header.size
+        index = {}
+        for key, record in entries:
+            data = json.dumps(record, separators=(",", ":")).encode()
+            f.write(data)
+            bucket = index.setdefault(record["__class__"], {})
+            bucket[key] = [offset, len(data)]
+            offset += len(data)
+        data = json.dumps(index, separators=(",", ":")).encode()
+        f.write(data)
+        f.seek(0)
+        f.write(self.header.pack(self.magic, offset, len(data)))
+        f.seek(0, os.SEEK_END)
+
+    def open(self, f):
+        """maps the snapshot in the binary file f, returns a MappedSnapshot"""
+        return MappedSnapshot(f)
+
+    def load(self, f):
+        """yields the (key, record) pairs read from the binary file f"""
+        snapshot = MappedSnapshot(f)
+        for bucket in snapshot.index.values():
+            for key, (offset, length) in bucket.items():
+                yield key, snapshot.record(offset, length)
+
+
+class MappedSnapshot:
+    """a read-only memory map of a snapshot written by MappedCodec"""
+
+    def __init__(self, f):
+        """maps the binary file f and reads its index"""
+        self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, offset, length = MappedCodec.header.unpack_from(self.__map)
+        if magic != MappedCodec.magic:
+            raise ValueError("not a mapped snapshot")
+        # dictionary - <class name> -> {<key>: [offset, length]}
+        self.index = json.loads(self.__map[offset:offset + length])
+        self.size = len(self.__map)
+
+    def record(self, offset, length):
+        """decodes the record stored at offset"""
+        return json.loads(self.__map[offset:offset + length])
+
+
+formats = {"json": JSONCodec, "pickle": PickleCodec,
+           "marshal": MarshalCodec, "msgpack": MsgpackCodec,
+           "mmap": MappedCodec}
+
+
+def get_codec(name):
+    """returns the codec for the format name, ValueError if unknown"""
+    if name not in formats:
+        raise ValueError("unknown snapshot format: {}".format(name))
+    return formats[name]()
+
+
+def convert(src_path, src_format, dst_path, dst_format):
+    """rewrites a snapshot in another format, one record at a time"""
+    src_codec = get_codec(src_format)
+    dst_codec = get_codec(dst_format)
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        dst_codec.dump(src_codec.load(src), dst)
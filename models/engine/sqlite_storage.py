@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""
+Contains the class SQLiteStorage
+"""
+
+from models.base_model import Base
+from models.engine.db_storage import DBStorage, pool_options
+from os import getenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+# the pragmas set on every new connection: write-ahead logging so readers
+# never wait for the writer, fsync at checkpoints only, enforced foreign
+# keys, a wait for locks instead of "database is locked", a 64MiB page
+# cache, temporary tables in memory and 256MiB of memory-mapped I/O
+pragmas = ("journal_mode=WAL", "synchronous=NORMAL", "foreign_keys=ON",
+           "busy_timeout=5000", "cache_size=-65536", "temp_store=MEMORY",
+           "mmap_size=268435456")
+
+
+def set_pragmas(connection, record):
+    """applies the pragmas to a new SQLite connection"""
+    cursor = connection.cursor()
+    for pragma in pragmas:
+        cursor.execute("PRAGMA " + pragma)
+    cursor.close()
+
+
+class SQLiteStorage(DBStorage):
+    """keeps the SQLAlchemy models in a local SQLite database"""
+
+    def make_engine(self):
+        """returns the engine to the SQLite file named in the env"""
+        return self.__sqlite_engine(getenv('HBNB_SQLITE_PATH', 'hbnb.db'))
+
+    def make_replica_engine(self):
+        """
+        returns the engine to the SQLite file standing in for a read
+        replica, HBNB_SQLITE_REPLICA_PATH, with the tables created; None
+        when it is not set
+        """
+        path = getenv('HBNB_SQLITE_REPLICA_PATH')
+        if not path:
+            return None
+        engine = self.__sqlite_engine(path)
+        Base.metadata.create_all(engine)
+        return engine
+
+    @staticmethod
+    def __sqlite_engine(path):
+        """returns an engine to the SQLite file path"""
+        options = {"connect_args": {"check_same_thread": False}}
+        if path == ":memory:":
+            # every connection to :memory: is a new database: share one
+            options["poolclass"] = StaticPool
+        else:
+            options.update(pool_options())
+        engine = create_engine('sqlite:///' + path, **options)
+        event.listen(engine, "connect", set_pragmas)
+        return engine
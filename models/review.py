@@ -1,22 +1,27 @@
 #!/usr/bin/python
 """ holds class Review"""
 import models
-from models.base_model import BaseModel, Base
+from models.base_model import BaseModel, Base, IndexedAttribute
 from os import getenv
 import sqlalchemy
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 
 
 class Review(BaseModel, Base):
     """Representation of Review """
     if models.storage_t == 'db':
         __tablename__ = 'reviews'
+        # Place.reviews lists the reviews of a place, newest or oldest
+        # first; the composite index serves both and place_id alone
+        __table_args__ = (Index('ix_reviews_place_id_created_at',
+                                'place_id', 'created_at'),)
         place_id = Column(String(60), ForeignKey('places.id'), nullable=False)
-        user_id = Column(String(60), ForeignKey('users.id'), nullable=False)
+        user_id = Column(String(60), ForeignKey('users.id'), nullable=False,
+                         index=True)
         text = Column(String(1024), nullable=False)
     else:
-        place_id = ""
-        user_id = ""
+        place_id = IndexedAttribute()
+        user_id = IndexedAttribute()
         text = ""
 
     def __init__(self, *args, **kwargs):
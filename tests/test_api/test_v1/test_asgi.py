@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+"""Unittest for asgi.py"""
+
+import importlib.util
+import json
+import models
+from models import storage
+from models.engine import async_storage
+from models.state import State
+import pycodestyle
+import unittest
+
+# in db mode the ASGI app runs on the async engine, which needs greenlet
+# and, for SQLite, the aiosqlite driver
+missing = models.storage_t == 'db' and (
+    async_storage.create_async_engine is None or
+    importlib.util.find_spec("aiosqlite") is None)
+if not missing:
+    from api.v1 import asgi
+
+
+class TestASGIDocs(unittest.TestCase):
+    """Tests to check the style of the ASGI app"""
+    def test_pep8_conformance_asgi(self):
+        """Test that api/v1/asgi.py conforms to PEP8."""
+        pep8s = pycodestyle.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/asgi.py',
+                                    'tests/test_api/test_v1/test_asgi.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+
+@unittest.skipIf(missing, "greenlet or aiosqlite is not installed")
+class TestASGI(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the routes of the ASGI app"""
+
+    async def asyncTearDown(self):
+        """Close the connections opened in this test's event loop"""
+        await asgi.storage.adispose()
+
+    async def request(self, method, path, body=None):
+        """Calls the app, returns the status and the decoded JSON body"""
+        if body is not None and not isinstance(body, str):
+            body = json.dumps(body)
+        messages = []
+
+        async def receive():
+            """Returns the request body in one message"""
+            return {"type": "http.request",
+                    "body": (body or "").encode("utf-8")}
+
+        async def send(message):
+            """Keeps the response messages"""
+            messages.append(message)
+        scope = {"type": "http", "method": method, "path": path}
+        await asgi.app(scope, receive, send)
+        self.assertEqual(messages[0]["type"], "http.response.start")
+        return messages[0]["status"], json.loads(messages[1]["body"])
+
+    async def test_status(self):
+        """Tests the status route"""
+        self.assertEqual(await self.request("GET", "/api/v1/status"),
+                         (200, {"status": "OK"}))
+
+    async def test_stats(self):
+        """Tests the stats route against the counts of the storage"""
+        status, stats = await self.request("GET", "/api/v1/stats/")
+        self.assertEqual(status, 200)
+        self.assertEqual(stats["states"], storage.count(State))
+
+    async def test_state_crud(self):
+        """Tests creating, listing, reading, updating and deleting"""
+        status, state = await self.request("POST", "/api/v1/states",
+                                           {"name": "California"})
+        self.assertEqual(status, 201)
+        self.assertEqual(state["name"], "California")
+        url = "/api/v1/states/" + state["id"]
+        status, states = await self.request("GET", "/api/v1/states")
+        self.assertIn(state, states)
+        self.assertEqual(await self.request("GET", url), (200, state))
+        status, updated = await self.request("PUT", url, {"name": "Nevada",
+                                                          "id": "other"})
+        self.assertEqual((status, updated["name"]), (200, "Nevada"))
+        self.assertEqual(updated["id"], state["id"])
+        self.assertEqual(await self.request("DELETE", url), (200, {}))
+        self.assertEqual(await self.request("GET", url),
+                         (404, {"error": "Not found"}))
+
+    async def test_nested(self):
+        """Tests the cities of a state and the checks on the parent"""
+        status, state = await self.request("POST", "/api/v1/states",
+                                           {"name": "Oregon"})
+        url = "/api/v1/states/{}/cities".format(state["id"])
+        status, city = await self.request("POST", url, {"name": "Salem"})
+        self.assertEqual((status, city["state_id"]), (201, state["id"]))
+        self.assertEqual(await self.request("GET", url), (200, [city]))
+        self.assertEqual((await self.request(
+            "GET", "/api/v1/states/nope/cities"))[0], 404)
+        place_url = "/api/v1/cities/{}/places".format(city["id"])
+        self.assertEqual(await self.request("POST", place_url,
+                                            {"user_id": "nope",
+                                             "name": "Loft"}),
+                         (404, {"error": "Not found"}))
+
+    async def test_errors(self):
+        """Tests the 400 and 404 errors"""
+        self.assertEqual(await self.request("POST", "/api/v1/states",
+                                            "not json"),
+                         (400, {"error": "Not a JSON"}))
+        self.assertEqual(await self.request("POST", "/api/v1/users",
+                                            {"email": "a@hbnb.io"}),
+                         (400, {"error": "Missing password"}))
+        self.assertEqual((await self.request("GET", "/api/v1/nope"))[0],
+                         404)
+        self.assertEqual((await self.request("GET", "/api/v1/cities"))[0],
+                         404)
+        self.assertEqual((await self.request("PATCH", "/api/v1/states"))[0],
+                         405)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -42,6 +42,14 @@ class TestIndex(unittest.TestCase):
                     "users": storage.count(User)}
         self.assertEqual(json.loads(response.data), expected)
 
+    def test_metrics(self):
+        """Tests the metrics route reports what the storage exposes"""
+        response = self.app.get('/api/v1/metrics')
+        self.assertEqual(response.status_code, 200)
+        metrics = json.loads(response.data)
+        self.assertEqual("pool" in metrics, hasattr(storage, "pool_stats"))
+        self.assertEqual("load" in metrics, hasattr(storage, "load_stats"))
+
 
 if __name__ == "__main__":
     unittest.main()
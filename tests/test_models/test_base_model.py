@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Test BaseModel for expected behavior and documentation"""
 from datetime import datetime
+import json
 import inspect
 import models
 import pycodestyle
@@ -159,3 +160,98 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(old_created_at, new_created_at)
         self.assertTrue(mock_storage.new.called)
         self.assertTrue(mock_storage.save.called)
+
+
+class TestTimestamps(unittest.TestCase):
+    """Test the fast timestamp parsing and formatting helpers"""
+    t_format = "%Y-%m-%dT%H:%M:%S.%f"
+    samples = [datetime(2017, 9, 28, 21, 3, 54, 52298),
+               datetime(2017, 9, 28, 21, 3, 54),
+               datetime(2024, 2, 29, 0, 0, 0, 1),
+               datetime(999, 1, 1, 12, 30, 0, 500000),
+               datetime.utcnow()]
+
+    def test_format_time(self):
+        """format_time matches strftime exactly"""
+        for value in self.samples:
+            with self.subTest(value=value):
+                self.assertEqual(models.base_model.format_time(value),
+                                 value.strftime(self.t_format))
+
+    def test_parse_time(self):
+        """parse_time reads back what strftime wrote"""
+        for value in self.samples[:3] + self.samples[4:]:
+            text = value.strftime(self.t_format)
+            with self.subTest(text=text):
+                self.assertEqual(models.base_model.parse_time(text),
+                                 datetime.strptime(text, self.t_format))
+
+    def test_parse_time_fallback(self):
+        """non canonical strings go through strptime and its rules"""
+        text = "2017-9-28T21:3:54.52"
+        self.assertEqual(models.base_model.parse_time(text),
+                         datetime.strptime(text, self.t_format))
+        for text in ("2017-09-28 21:03:54.052298",
+                     "2017-09-28T21:03:54.052+01",
+                     "2017-W39-4T21:05:54.119427",
+                     "2017-09-28"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    models.base_model.parse_time(text)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_to_dict_cache(self):
+        """to_dict reuses formatted timestamps until they change"""
+        inst = BaseModel()
+        first = inst.to_dict()
+        with mock.patch.object(models.base_model, 'format_time') as fmt:
+            self.assertEqual(inst.to_dict(), first)
+            fmt.assert_not_called()
+        inst.updated_at = datetime(2020, 1, 1)
+        self.assertEqual(inst.to_dict()["updated_at"],
+                         "2020-01-01T00:00:00.000000")
+        self.assertEqual(inst.to_dict()["created_at"], first["created_at"])
+        self.assertCountEqual(inst.__dict__,
+                              ["id", "created_at", "updated_at"])
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestSerializationCache(unittest.TestCase):
+    """Test the cached to_dict and to_json forms of BaseModel"""
+    def test_to_json(self):
+        """to_json encodes to_dict and is reused while nothing changes"""
+        inst = BaseModel(name="Holberton")
+        text = inst.to_json()
+        self.assertEqual(json.loads(text), inst.to_dict())
+        with mock.patch.object(models.base_model.json, 'dumps') as dumps:
+            self.assertIs(inst.to_json(), text)
+            dumps.assert_not_called()
+
+    def test_to_dict_is_a_copy(self):
+        """changing the returned dict does not touch the cache"""
+        inst = BaseModel()
+        inst.to_dict()["name"] = "changed"
+        self.assertNotIn("name", inst.to_dict())
+
+    def test_setattr_invalidates(self):
+        """assigning or deleting an attribute rebuilds both forms"""
+        inst = BaseModel()
+        inst.to_json()
+        inst.name = "Betty"
+        self.assertEqual(inst.to_dict()["name"], "Betty")
+        self.assertEqual(json.loads(inst.to_json())["name"], "Betty")
+        del inst.name
+        self.assertNotIn("name", inst.to_dict())
+        self.assertNotIn("name", json.loads(inst.to_json()))
+
+    @mock.patch('models.storage')
+    def test_save_invalidates(self, mock_storage):
+        """save() moves updated_at and so refreshes the cache"""
+        inst = BaseModel()
+        before = json.loads(inst.to_json())["updated_at"]
+        time.sleep(1e-3)
+        inst.save()
+        self.assertNotEqual(json.loads(inst.to_json())["updated_at"],
+                            before)
+        self.assertEqual(inst.to_dict()["updated_at"],
+                         inst.updated_at.strftime("%Y-%m-%dT%H:%M:%S.%f"))
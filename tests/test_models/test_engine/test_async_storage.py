@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""
+Contains the TestAsyncStorageDocs, TestThreadedStorage and
+TestAsyncSQLiteStorage classes
+"""
+
+import asyncio
+import importlib.util
+import inspect
+import models
+from models.engine import async_storage
+from models.city import City
+from models.state import State
+import os
+import pycodestyle
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+AsyncSQLiteStorage = async_storage.AsyncSQLiteStorage
+ThreadedStorage = async_storage.ThreadedStorage
+
+# the async engine needs greenlet and, for SQLite, the aiosqlite driver
+missing = (async_storage.create_async_engine is None or
+           importlib.util.find_spec("aiosqlite") is None)
+
+
+class TestAsyncStorageDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the async storages"""
+    def test_pep8_conformance_async_storage(self):
+        """Test that models/engine/async_storage.py conforms to PEP8."""
+        pep8s = pycodestyle.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/async_storage.py',
+                                    'tests/test_models/test_engine/\
+test_async_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_async_storage_docstrings(self):
+        """Test for the docstrings of the module, classes and methods"""
+        self.assertTrue(len(async_storage.__doc__) >= 1)
+        for cls in (async_storage.AsyncDBStorage, AsyncSQLiteStorage,
+                    ThreadedStorage):
+            self.assertTrue(len(cls.__doc__) >= 1)
+            for func in inspect.getmembers(cls, inspect.isfunction):
+                self.assertTrue(len(func[1].__doc__) >= 1)
+        self.assertTrue(len(async_storage.make_async_storage.__doc__) >= 1)
+
+
+class TestThreadedStorage(unittest.IsolatedAsyncioTestCase):
+    """Test that ThreadedStorage runs the storage calls in threads"""
+    def setUp(self):
+        """Wrap a mock storage that records the thread of each call"""
+        self.threads = []
+        self.storage = MagicMock()
+        for name in ("get", "save", "records_json"):
+            getattr(self.storage, name).side_effect = self.record
+        self.threaded = ThreadedStorage(self.storage)
+
+    def record(self, *args, **kwargs):
+        """Keep the thread the call runs in"""
+        self.threads.append(threading.get_ident())
+        return args
+
+    async def test_calls_run_off_the_loop(self):
+        """each call is made in a worker thread with the same arguments"""
+        self.assertEqual(await self.threaded.aget(State, "1"), (State, "1"))
+        await self.threaded.asave()
+        await self.threaded.arecords_json(City, state_id="1")
+        self.storage.records_json.assert_called_once_with(City,
+                                                          state_id="1")
+        self.assertEqual(len(self.threads), 3)
+        self.assertNotIn(threading.get_ident(), self.threads)
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+@unittest.skipIf(missing, "greenlet or aiosqlite is not installed")
+class TestAsyncSQLiteStorage(unittest.IsolatedAsyncioTestCase):
+    """Test AsyncSQLiteStorage against a temporary database file"""
+    async def asyncSetUp(self):
+        """Open an async storage on an empty database file"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "hbnb.db")
+        with patch.dict(os.environ, {"HBNB_SQLITE_PATH": path}):
+            self.storage = AsyncSQLiteStorage()
+        await self.storage.areload()
+
+    async def asyncTearDown(self):
+        """Close the connections of the storage"""
+        await self.storage.adispose()
+
+    async def test_storage_api(self):
+        """anew, asave, aget, acount, aall, arecords and adelete"""
+        state = State(name="California")
+        city = City(name="San Francisco", state_id=state.id)
+        await self.storage.anew(state)
+        await self.storage.anew(city)
+        await self.storage.asave()
+        await self.storage.aclose()
+        loaded = await self.storage.aget(State, state.id)
+        self.assertEqual(loaded.to_dict(), state.to_dict())
+        self.assertEqual(await self.storage.acount(), 2)
+        self.assertEqual(await self.storage.acount("City"), 1)
+        self.assertEqual(list(await self.storage.aall(City)),
+                         ["City." + city.id])
+        self.assertEqual(await self.storage.arecords(
+            City, state_id=state.id), [city.to_dict()])
+        await self.storage.adelete(await self.storage.aget(City, city.id))
+        await self.storage.asave()
+        self.assertEqual(await self.storage.acount(City), 0)
+        self.assertIsNone(await self.storage.aget("Dummy", state.id))
+        await self.storage.aclose()
+
+    async def test_session_per_task(self):
+        """concurrent tasks read through sessions of their own"""
+        state = State(name="Nevada")
+        await self.storage.anew(state)
+        await self.storage.asave()
+
+        async def read():
+            """Read the state in a task of its own, then close"""
+            loaded = await self.storage.aget(State, state.id)
+            await self.storage.aclose()
+            return loaded
+        loaded = await asyncio.gather(read(), read())
+        self.assertIsNot(loaded[0], loaded[1])
+        self.assertEqual(loaded[0].name, "Nevada")
+        await self.storage.aclose()
+
+    async def test_pragmas(self):
+        """the async connections get the pragmas of SQLiteStorage"""
+        engine = self.storage._AsyncDBStorage__engine
+        async with engine.connect() as connection:
+            result = await connection.exec_driver_sql("PRAGMA journal_mode")
+            self.assertEqual(result.scalar(), "wal")
+
+
+if __name__ == '__main__':
+    unittest.main()
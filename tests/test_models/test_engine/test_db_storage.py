@@ -17,6 +17,9 @@ from models.user import User
 import json
 import os
 import pycodestyle
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError
+import tempfile
 import unittest
 from unittest.mock import patch, create_autospec, MagicMock
 DBStorage = db_storage.DBStorage
@@ -111,25 +114,209 @@ class TestFileStorage(unittest.TestCase):
         new_count = models.storage.count()
         self.assertEqual(initial_count + 1, new_count)
 
+    def statements(self):
+        """Return the list the SQL statements run from now on go to"""
+        engine = models.storage._DBStorage__engine
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            """Keep the statement about to be run"""
+            statements.append(statement)
+        event.listen(engine, "before_cursor_execute", record)
+        self.addCleanup(event.remove, engine, "before_cursor_execute",
+                        record)
+        return statements
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_get_uses_identity_map(self):
+        """get returns a loaded object without a query"""
+        state = State(name="Oregon")
+        models.storage.new(state)
+        models.storage.save()
+        statements = self.statements()
+        self.assertIs(models.storage.get("State", state.id), state)
+        self.assertEqual(statements, [])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_all_include(self):
+        """included relationships are loaded with one query per level"""
+        state = State(name="Utah")
+        models.storage.new(state)
+        models.storage.new(City(name="Provo", state_id=state.id))
+        models.storage.save()
+        models.storage.close()
+        statements = self.statements()
+        states = models.storage.all(State, include=["cities.places"])
+        self.assertEqual(len(statements), 3)
+        for loaded in states.values():
+            for city in loaded.cities:
+                city.places
+        self.assertEqual(len(statements), 3)
+        models.storage.close()
+        loaded = models.storage.get(State, state.id, include=["cities"])
+        self.assertEqual([city.name for city in loaded.cities], ["Provo"])
+        self.assertEqual(len(statements), 5)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_iter_pages_by_id(self):
+        """iter() walks a class in id order, one keyset query per batch"""
+        for i in range(5):
+            models.storage.new(Amenity(name="amenity {}".format(i)))
+        models.storage.save()
+        ids = sorted(obj.id for obj in models.storage.all(Amenity).values())
+        statements = self.statements()
+        self.assertEqual([obj.id for obj in
+                          models.storage.iter(Amenity, batch_size=2)], ids)
+        self.assertEqual(len(statements), len(ids) // 2 + 1)
+        self.assertEqual([obj.id for obj in models.storage.iter(
+            "Amenity", batch_size=2, after_id=ids[1])], ids[2:])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_new_many(self):
+        """new_many() adds every object to the session"""
+        states = [State(name="bulk {}".format(i)) for i in range(3)]
+        models.storage.new_many(states)
+        models.storage.save()
+        for state in states:
+            self.assertIs(models.storage.get(State, state.id), state)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_bulk_upsert(self):
+        """bulk_upsert() inserts and updates in one statement per shape"""
+        state = State(name="Oregon")
+        models.storage.new(state)
+        models.storage.save()
+        created_at = state.created_at
+        statements = self.statements()
+        models.storage.bulk_upsert("State", [
+            {"id": state.id, "name": "Idaho"},
+            {"name": "Maine"},
+            {"id": "bulk-upsert-id", "name": "Iowa", "__class__": "State",
+             "created_at": "2017-09-28T21:03:54.052298"}])
+        self.assertEqual(len([statement for statement in statements
+                              if statement.startswith("INSERT")]), 2)
+        state = models.storage.get(State, state.id)
+        self.assertEqual(state.name, "Idaho")
+        self.assertEqual(state.created_at, created_at)
+        iowa = models.storage.get(State, "bulk-upsert-id")
+        self.assertEqual(iowa.created_at.year, 2017)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_records(self):
+        """records() matches to_dict() with one query and no objects"""
+        state = State(name="Vermont")
+        city = City(name="Burlington", state_id=state.id)
+        models.storage.new_many([state, city])
+        models.storage.save()
+        models.storage.close()
+        expected = models.storage.get(City, city.id).to_dict()
+        models.storage.close()
+        statements = self.statements()
+        records = models.storage.records("City", state_id=state.id)
+        self.assertEqual(records, [expected])
+        self.assertEqual(len(statements), 1)
+        session = models.storage._DBStorage__session
+        self.assertEqual(len(session.identity_map), 0)
+        self.assertEqual(models.storage.records_json(City, state_id="none"),
+                         [])
+        self.assertEqual(json.loads(models.storage.records_json(
+            State, id=state.id)[0]), state.to_dict())
+        self.assertEqual(models.storage.records("DummyClass"), [])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_count_is_one_query(self):
+        """count of every class is a single COUNT query"""
+        statements = self.statements()
+        models.storage.count()
+        models.storage.count(State)
+        self.assertEqual(len(statements), 2)
+        self.assertIn("count(*)", statements[0])
+
 
 class TestDBStorage(unittest.TestCase):
+    """Test the queries DBStorage get and count issue"""
     def setUp(self):
-        self.storage = DBStorage()
-
-    @patch.object(DBStorage, 'all')
-    def test_get(self, mock_all):
-        mock_all.return_value = {'1': MagicMock(
-            id='1'), '2': MagicMock(id='2')}
-        result = self.storage.get('DummyClass', '1')
-        self.assertEqual(result.id, '1')
+        """Build a DBStorage on a mock engine and session"""
+        with patch.object(DBStorage, 'make_engine'), \
+                patch.dict(os.environ, {'HBNB_ENV': ''}):
+            self.storage = DBStorage()
+        self.session = MagicMock()
+        self.storage._DBStorage__session = self.session
+
+    def test_get(self):
+        """get looks the object up by primary key"""
+        result = self.storage.get('State', '1')
+        self.session.get.assert_called_once_with(State, '1', options=[])
+        self.assertIs(result, self.session.get.return_value)
+        self.storage.get(City, '2')
+        self.session.get.assert_called_with(City, '2', options=[])
         self.assertIsNone(self.storage.get('DummyClass', '3'))
+        self.session.query.assert_not_called()
+
+    def test_count(self):
+        """count asks the database instead of loading the rows"""
+        query = self.session.query.return_value
+        query.select_from.return_value.scalar.return_value = 2
+        self.assertEqual(self.storage.count('State'), 2)
+        query.select_from.assert_called_with(State)
+        query.one.return_value = (1, 2, 3, 0, 0, 0)
+        self.assertEqual(self.storage.count(), 6)
+        query.one.assert_called_once_with()
+        self.assertEqual(self.storage.count('DummyClass'), 0)
+        query.all.assert_not_called()
+
+
+class TestDBStoragePool(unittest.TestCase):
+    """Test the connection pool settings and statistics"""
+    def setUp(self):
+        """Build a DBStorage on a pooled engine to a temporary SQLite file"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings = {'HBNB_DB_POOL_SIZE': '1', 'HBNB_DB_MAX_OVERFLOW': '0',
+                    'HBNB_DB_POOL_TIMEOUT': '0.05', 'HBNB_ENV': ''}
+        with patch.dict(os.environ, settings):
+            self.engine = create_engine(
+                'sqlite:///' + os.path.join(tmp.name, 'pool.db'),
+                **db_storage.pool_options())
+            with patch.object(DBStorage, 'make_engine',
+                              return_value=self.engine):
+                self.storage = DBStorage()
+        self.addCleanup(self.engine.dispose)
+
+    def test_pool_options(self):
+        """the pool settings are read from the environment"""
+        settings = {'HBNB_DB_POOL_SIZE': '20', 'HBNB_DB_MAX_OVERFLOW': '5',
+                    'HBNB_DB_POOL_TIMEOUT': '2.5',
+                    'HBNB_DB_POOL_RECYCLE': '600',
+                    'HBNB_DB_POOL_PRE_PING': '0'}
+        with patch.dict(os.environ, settings):
+            options = db_storage.pool_options()
+        self.assertEqual(options, {"poolclass": db_storage.TimedQueuePool,
+                                   "pool_size": 20, "max_overflow": 5,
+                                   "pool_timeout": 2.5, "pool_recycle": 600,
+                                   "pool_pre_ping": False})
+        self.assertTrue(db_storage.pool_options()["pool_pre_ping"])
+        # only "0" turns pre-ping off
+        with patch.dict(os.environ, {'HBNB_DB_POOL_PRE_PING': 'true'}):
+            self.assertTrue(db_storage.pool_options()["pool_pre_ping"])
 
-    @patch.object(DBStorage, 'all')
-    def test_count(self, mock_all):
-        mock_all.return_value = {'1': MagicMock(), '2': MagicMock()}
-        self.assertEqual(self.storage.count(), 2)
-        mock_all.return_value = {'1': MagicMock()}
-        self.assertEqual(self.storage.count('DummyClass'), 1)
+    def test_pool_stats(self):
+        """checked out connections, waits and timeouts are reported"""
+        connection = self.engine.connect()
+        stats = self.storage.pool_stats()
+        self.assertEqual(stats["size"], 1)
+        self.assertEqual(stats["checked_out"], 1)
+        self.assertEqual(stats["overflow"], 0)
+        self.assertEqual(stats["checkouts"], 1)
+        with self.assertRaises(TimeoutError):
+            self.engine.connect()
+        connection.close()
+        stats = self.storage.pool_stats()
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["checked_in"], 1)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreaterEqual(stats["max_wait_seconds"], 0.05)
+        self.assertGreater(stats["mean_wait_seconds"], 0)
 
 
 if __name__ == '__main__':
@@ -7,6 +7,7 @@ from datetime import datetime
 import inspect
 import models
 from models.engine import file_storage
+from models.engine import snapshot
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -15,8 +16,13 @@ from models.review import Review
 from models.state import State
 from models.user import User
 import json
+import io
+import multiprocessing
 import os
 import pycodestyle
+import stat
+import tempfile
+import threading
 import unittest
 from unittest.mock import patch, create_autospec, MagicMock
 FileStorage = file_storage.FileStorage
@@ -143,20 +149,897 @@ class TestFileStorage(unittest.TestCase):
     def setUp(self):
         self.storage = FileStorage()
 
-    @patch.object(FileStorage, 'all')
-    def test_get(self, mock_all):
-        mock_all.return_value = {'1': MagicMock(
-            id='1'), '2': MagicMock(id='2')}
-        result = self.storage.get('DummyClass', '1')
-        self.assertEqual(result.id, '1')
+    def test_get(self):
+        state = State()
+        self.storage.new(state)
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.assertIs(self.storage.get('State', state.id), state)
+        self.assertIsNone(self.storage.get('City', state.id))
         self.assertIsNone(self.storage.get('DummyClass', '3'))
 
-    @patch.object(FileStorage, 'all')
-    def test_count(self, mock_all):
-        mock_all.return_value = {'1': MagicMock(), '2': MagicMock()}
+    def test_get_after_delete(self):
+        state = State()
+        self.storage.new(state)
+        self.storage.delete(state)
+        self.assertIsNone(self.storage.get(State, state.id))
+
+    def test_all_cls(self):
+        state = State()
+        city = City()
+        self.storage.new(state)
+        self.storage.new(city)
+        for cls in (State, 'State'):
+            with self.subTest(cls=cls):
+                states = self.storage.all(cls)
+                self.assertIs(states["State." + state.id], state)
+                self.assertNotIn("City." + city.id, states)
+                self.assertTrue(all(type(obj) is State
+                                    for obj in states.values()))
+        self.assertEqual(self.storage.all('DummyClass'), {})
+
+    def test_all_cls_is_a_copy(self):
+        state = State()
+        self.storage.new(state)
+        self.storage.all(State).clear()
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.assertIn("State." + state.id, self.storage.all())
+
+    def test_get_does_not_scan(self):
+        state = State()
+        self.storage.new(state)
+        with patch.object(FileStorage, 'all') as mock_all:
+            self.assertIs(self.storage.get(State, state.id), state)
+            mock_all.assert_not_called()
+
+    def test_close_skips_unchanged_file(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "file.json")
+        with patch.object(FileStorage, '_FileStorage__file_path', path), \
+                patch.object(FileStorage, '_FileStorage__stamp', None):
+            self.storage.new(State())
+            self.storage.save()
+            load = snapshot.JSONCodec.load
+            with patch.object(snapshot.JSONCodec, 'load', autospec=True,
+                              side_effect=load) as mock_load:
+                self.storage.close()
+                self.storage.close()
+                mock_load.assert_not_called()
+                state = State()
+                with open(path, 'w') as f:
+                    json.dump({"State." + state.id: state.to_dict()}, f)
+                self.storage.close()
+                self.storage.close()
+                self.assertEqual(mock_load.call_count, 1)
+            self.assertIsNotNone(self.storage.get(State, state.id))
+
+    def test_concurrent_close_parses_once(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "file.json")
+        state = State()
+        with open(path, 'w') as f:
+            json.dump({"State." + state.id: state.to_dict()}, f)
+        load = snapshot.JSONCodec.load
+        with patch.object(FileStorage, '_FileStorage__file_path', path), \
+                patch.object(FileStorage, '_FileStorage__stamp', None), \
+                patch.object(snapshot.JSONCodec, 'load', autospec=True,
+                             side_effect=load) as mock_load:
+            threads = [threading.Thread(target=self.storage.close)
+                       for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(mock_load.call_count, 1)
+
+    def test_count(self):
+        isolate_storage(self)
+        self.storage.new(State())
+        self.storage.new(City())
         self.assertEqual(self.storage.count(), 2)
-        mock_all.return_value = {'1': MagicMock()}
-        self.assertEqual(self.storage.count('DummyClass'), 1)
+        self.assertEqual(self.storage.count(State), 1)
+        self.assertEqual(self.storage.count('City'), 1)
+        self.assertEqual(self.storage.count('DummyClass'), 0)
+
+
+def isolate_storage(test, **settings):
+    """Point FileStorage at an empty temporary directory for one test"""
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    path = os.path.join(tmp.name, "file.json")
+    patches = {'file_path': path, 'objects': {}, 'classes': {},
+               'dirty': set(), 'stamp': None, 'journal': False,
+               'journal_records': 0, 'checkpoint_every': 1000,
+               'commit_window': 0, 'pending': None, 'lazy': False,
+               'raw': {}, 'fk': {}, 'generation': None,
+               'journal_offset': 0}
+    patches.update(settings)
+    for name, value in patches.items():
+        patcher = patch.object(FileStorage, '_FileStorage__' + name, value)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    return path
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageJournal(unittest.TestCase):
+    """Test the append-only journal mode of FileStorage"""
+    def setUp(self):
+        """Point FileStorage at an empty temporary directory"""
+        self.path = isolate_storage(self, journal=True)
+        self.storage = FileStorage()
+
+    def fresh_reload(self):
+        """Forget everything in memory and load it back from disk"""
+        FileStorage._FileStorage__objects.clear()
+        FileStorage._FileStorage__classes.clear()
+        FileStorage._FileStorage__stamp = None
+        self.storage.reload()
+
+    def journal_lines(self):
+        """Return the lines currently in the journal"""
+        with open(self.path + ".journal") as f:
+            return f.readlines()
+
+    def test_save_appends_only_changes(self):
+        """save() appends records for changed objects, not the whole set"""
+        first = State(name="California")
+        first.save()
+        second = State(name="Nevada")
+        second.save()
+        self.assertFalse(os.path.exists(self.path))
+        lines = self.journal_lines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1])["key"], "State." + second.id)
+
+    def test_reload_replays_journal(self):
+        """reload() applies creates, updates and deletes from the journal"""
+        kept = State(name="California")
+        kept.save()
+        gone = State(name="Nevada")
+        gone.save()
+        kept.name = "Oregon"
+        kept.save()
+        self.storage.delete(gone)
+        self.storage.save()
+        self.fresh_reload()
+        self.assertEqual(self.storage.get(State, kept.id).name, "Oregon")
+        self.assertIsNone(self.storage.get(State, gone.id))
+
+    def test_setattr_is_saved(self):
+        """an attribute set on a stored object is journaled by save()"""
+        state = State(name="California")
+        state.save()
+        setattr(self.storage.get(State, state.id), "name", "Oregon")
+        self.storage.save()
+        self.fresh_reload()
+        self.assertEqual(self.storage.get(State, state.id).name, "Oregon")
+
+    def test_checkpoint_folds_journal(self):
+        """a checkpoint writes the JSON file and removes the journal"""
+        FileStorage._FileStorage__checkpoint_every = 3
+        states = [State(name=str(i)) for i in range(3)]
+        for state in states:
+            state.save()
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        with open(self.path) as f:
+            self.assertEqual(len(json.load(f)), 3)
+        states[0].name = "changed"
+        states[0].save()
+        self.assertEqual(len(self.journal_lines()), 1)
+        self.fresh_reload()
+        self.assertEqual(self.storage.count(State), 3)
+        self.assertEqual(self.storage.get(State, states[0].id).name,
+                         "changed")
+
+    def test_torn_record_is_ignored(self):
+        """an interrupted final append does not break reload()"""
+        state = State(name="California")
+        state.save()
+        with open(self.path + ".journal", 'a') as f:
+            f.write('{"key": "State.torn", "val')
+        self.fresh_reload()
+        self.assertIsNotNone(self.storage.get(State, state.id))
+        self.assertEqual(self.storage.count(), 1)
+
+    def test_torn_tail_is_cut_before_appending(self):
+        """records saved after a torn append are not lost behind it"""
+        State(name="one").save()
+        State(name="two").save()
+        with open(self.path + ".journal", 'r+b') as f:
+            f.truncate(os.path.getsize(self.path + ".journal") - 30)
+        self.fresh_reload()
+        State(name="three").save()
+        State(name="four").save()
+        self.fresh_reload()
+        self.assertEqual({state.name for state in
+                          self.storage.all(State).values()},
+                         {"one", "three", "four"})
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageGroupCommit(unittest.TestCase):
+    """Test that FileStorage coalesces saves into group commits"""
+    def setUp(self):
+        """Use the journal with a long commit window"""
+        self.path = isolate_storage(self, journal=True, commit_window=60,
+                                    commit_batch=3, fsync="batch")
+        self.storage = FileStorage()
+
+    def test_saves_share_one_write(self):
+        """saves inside the window are written together by the batch"""
+        with patch('os.fsync') as mock_fsync:
+            handles = [State(name=str(i)).save() for i in range(3)]
+            # the journal, then the directory the journal was created in
+            self.assertEqual(mock_fsync.call_count, 2)
+        self.assertTrue(all(handle is handles[0] for handle in handles))
+        self.assertTrue(handles[0].wait(0))
+        with open(self.path + ".journal") as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    def test_pending_save_is_not_written(self):
+        """a save waits for the window or the batch before being written"""
+        handle = State(name="California").save()
+        self.assertFalse(handle.done())
+        self.assertFalse(os.path.exists(self.path + ".journal"))
+        self.storage.flush()
+        self.assertTrue(handle.wait(0))
+        self.assertTrue(os.path.exists(self.path + ".journal"))
+
+    def test_window_expiry_writes(self):
+        """the pending commit is written once the window ends"""
+        FileStorage._FileStorage__commit_window = 0.01
+        handle = State(name="California").save()
+        self.assertTrue(handle.wait(5))
+        self.assertTrue(os.path.exists(self.path + ".journal"))
+
+    def test_fsync_per_commit(self):
+        """fsync=commit writes and syncs every save on its own"""
+        FileStorage._FileStorage__fsync = "commit"
+        with patch('os.fsync') as mock_fsync:
+            for i in range(2):
+                self.assertTrue(State(name=str(i)).save().done())
+            # once per save, and once for the directory of the new journal
+            self.assertEqual(mock_fsync.call_count, 3)
+
+    def test_fsync_directory(self):
+        """the directory is synced once the journal or file is created"""
+        FileStorage._FileStorage__fsync = "commit"
+        synced = []
+
+        def fsync(fd):
+            """Record whether fd is a directory"""
+            synced.append(stat.S_ISDIR(os.fstat(fd).st_mode))
+        with patch('os.fsync', side_effect=fsync):
+            State(name="California").save()
+            State(name="Nevada").save()
+            self.assertEqual(synced, [False, True, False])
+            del synced[:]
+            self.storage.checkpoint()
+            self.assertEqual(synced, [False, True])
+
+    def test_no_fsync(self):
+        """fsync=none never syncs"""
+        FileStorage._FileStorage__fsync = "none"
+        with patch('os.fsync') as mock_fsync:
+            State(name="California").save()
+            self.storage.flush()
+            mock_fsync.assert_not_called()
+
+
+class TestFileStorageSave(unittest.TestCase):
+    """Test the streaming writer behind FileStorage.save"""
+    def setUp(self):
+        """Point FileStorage at an empty temporary directory"""
+        self.path = isolate_storage(self)
+        self.storage = FileStorage()
+
+    def test_output_matches_json_dump(self):
+        """the file is byte for byte what json.dump used to write"""
+        objs = [cls() for cls in classes.values()]
+        for obj in objs:
+            self.storage.new(obj)
+        self.storage.save()
+        expected = json.dumps({obj.__class__.__name__ + "." + obj.id:
+                               obj.to_dict() for obj in objs})
+        with open(self.path) as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_save_reuses_cached_json(self):
+        """objects that did not change are written from their to_json()"""
+        state = State(name="California")
+        self.storage.new(state)
+        text = state.to_json()
+        with patch.object(BaseModel, 'to_dict') as mock_to_dict:
+            self.storage.save()
+            mock_to_dict.assert_not_called()
+        with open(self.path) as f:
+            self.assertEqual(f.read(),
+                             '{"State.%s": %s}' % (state.id, text))
+
+    def test_empty_storage(self):
+        """an empty storage is saved as an empty JSON object"""
+        self.storage.save()
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "{}")
+
+    def test_failed_save_keeps_old_file(self):
+        """a save that fails midway leaves the previous file in place"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        with open(self.path) as f:
+            before = f.read()
+        broken = State()
+        self.storage.new(broken)
+        with patch.object(broken, 'to_json', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.storage.save()
+        with open(self.path) as f:
+            self.assertEqual(f.read(), before)
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+
+class TestFileStorageLazy(unittest.TestCase):
+    """Test that lazy mode builds objects only when they are asked for"""
+    def setUp(self):
+        """Save a few objects and load them back lazily"""
+        self.path = isolate_storage(self, lazy=True)
+        self.storage = FileStorage()
+        self.states = [State(name=str(i)) for i in range(3)]
+        self.city = City(name="San Francisco")
+        for obj in self.states + [self.city]:
+            self.storage.new(obj)
+        self.storage.save()
+        FileStorage._FileStorage__objects.clear()
+        FileStorage._FileStorage__classes.clear()
+        FileStorage._FileStorage__stamp = None
+        with patch.object(State, '__init__', side_effect=AssertionError):
+            self.storage.reload()
+
+    def test_count_does_not_build(self):
+        """count() counts raw records without building them"""
+        self.assertEqual(self.storage.count(), 4)
+        self.assertEqual(self.storage.count(State), 3)
+        self.assertEqual(FileStorage._FileStorage__objects, {})
+
+    def test_get_builds_one(self):
+        """get() builds just the object asked for, once"""
+        state = self.storage.get(State, self.states[0].id)
+        self.assertEqual(state.to_dict(), self.states[0].to_dict())
+        self.assertIs(self.storage.get(State, self.states[0].id), state)
+        self.assertEqual(len(FileStorage._FileStorage__objects), 1)
+        self.assertEqual(self.storage.count(), 4)
+
+    def test_all_cls_builds_one_class(self):
+        """all(cls) builds that class only"""
+        self.assertEqual(len(self.storage.all(State)), 3)
+        self.assertEqual(len(FileStorage._FileStorage__objects), 3)
+        self.assertEqual(len(self.storage.all()), 4)
+
+    def test_iter_builds_batch_by_batch(self):
+        """iter() builds each batch only when the caller reaches it"""
+        ids = sorted(state.id for state in self.states)
+        objs = self.storage.iter(State, batch_size=2)
+        self.assertEqual(next(objs).id, ids[0])
+        self.assertEqual(len(FileStorage._FileStorage__objects), 2)
+        self.assertEqual([obj.id for obj in objs], ids[1:])
+        self.assertEqual(len(FileStorage._FileStorage__objects), 3)
+        self.assertEqual([obj.id for obj in self.storage.iter(
+            State, after_id=ids[0])], ids[1:])
+        self.assertEqual(list(self.storage.iter(State, after_id=ids[2])),
+                         [])
+
+    def test_records_does_not_build(self):
+        """records() serves raw records as if they were to_dict()"""
+        records = self.storage.records(State)
+        self.assertCountEqual(records,
+                              [state.to_dict() for state in self.states])
+        self.assertEqual(FileStorage._FileStorage__objects, {})
+        self.assertEqual(self.storage.records(State, name="1"),
+                         [self.states[1].to_dict()])
+        self.assertEqual(FileStorage._FileStorage__objects, {})
+
+    def test_save_keeps_raw_records(self):
+        """save() writes raw records without building them"""
+        self.storage.get(City, self.city.id).name = "Oakland"
+        self.storage.new(self.storage.get(City, self.city.id))
+        self.storage.save()
+        self.assertEqual(len(FileStorage._FileStorage__objects), 1)
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertEqual(len(saved), 4)
+        self.assertEqual(saved["City." + self.city.id]["name"], "Oakland")
+
+    def test_delete_and_new_replace_raw(self):
+        """delete() and new() take over from the raw record"""
+        state = self.storage.get(State, self.states[0].id)
+        self.storage.delete(state)
+        self.assertIsNone(self.storage.get(State, state.id))
+        replacement = State(id=self.states[1].id, name="replacement")
+        self.storage.new(replacement)
+        self.assertIs(self.storage.get(State, replacement.id), replacement)
+        self.assertEqual(self.storage.count(State), 2)
+
+    def check_replaced_raw_city(self, add):
+        """add a city over the raw one, check it left the old index entry"""
+        old = self.city.to_dict().get("state_id")
+        self.assertEqual(self.storage.related(City, "state_id", "1"), [])
+        replacement = City(id=self.city.id, state_id="1")
+        add(replacement)
+        self.assertEqual(self.storage.related(City, "state_id", old), [])
+        self.assertEqual(self.storage.related(City, "state_id", "1"),
+                         [replacement])
+
+    def test_new_replaces_raw_in_related(self):
+        """new() moves a raw record out of its foreign key index entry"""
+        self.check_replaced_raw_city(self.storage.new)
+
+    def test_new_many_replaces_raw_in_related(self):
+        """new_many() moves a raw record out of its foreign key index entry"""
+        self.check_replaced_raw_city(lambda obj: self.storage.new_many([obj]))
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageRelated(unittest.TestCase):
+    """Test the foreign key indexes behind the relationship properties"""
+    def setUp(self):
+        """Store two states with a city each"""
+        self.path = isolate_storage(self)
+        self.storage = models.storage
+        self.ca = State(name="California")
+        self.nv = State(name="Nevada")
+        self.sf = City(name="San Francisco", state_id=self.ca.id)
+        self.lv = City(name="Las Vegas", state_id=self.nv.id)
+        for obj in (self.ca, self.nv, self.sf, self.lv):
+            self.storage.new(obj)
+
+    def test_cities(self):
+        """State.cities returns the cities of that state only"""
+        self.assertEqual(self.ca.cities, [self.sf])
+        self.assertEqual(self.nv.cities, [self.lv])
+
+    def test_cities_does_not_scan(self):
+        """once built, the index answers without listing the cities"""
+        self.ca.cities
+        with patch.object(FileStorage, 'all') as mock_all:
+            self.assertEqual(self.nv.cities, [self.lv])
+            mock_all.assert_not_called()
+
+    def test_index_follows_changes(self):
+        """new(), delete() and attribute updates keep the index current"""
+        self.assertEqual(self.ca.cities, [self.sf])
+        la = City(name="Los Angeles", state_id=self.ca.id)
+        self.storage.new(la)
+        self.assertCountEqual(self.ca.cities, [self.sf, la])
+        la.state_id = self.nv.id
+        self.assertEqual(self.ca.cities, [self.sf])
+        self.assertCountEqual(self.nv.cities, [self.lv, la])
+        self.storage.delete(self.lv)
+        self.assertEqual(self.nv.cities, [la])
+
+    def test_other_relationships(self):
+        """City.places, Place.reviews, User.places and User.reviews"""
+        user = User(email="a@hbnb.io")
+        place = Place(city_id=self.sf.id, user_id=user.id, name="Loft")
+        review = Review(place_id=place.id, user_id=user.id, text="Nice")
+        for obj in (user, place, review):
+            self.storage.new(obj)
+        self.assertEqual(self.sf.places, [place])
+        self.assertEqual(self.lv.places, [])
+        self.assertEqual(place.reviews, [review])
+        self.assertEqual(user.places, [place])
+        self.assertEqual(user.reviews, [review])
+
+    def test_records_where(self):
+        """records() and records_json() keep the matching objects only"""
+        self.assertEqual(self.storage.records(City, state_id=self.ca.id),
+                         [self.sf.to_dict()])
+        self.assertEqual(self.storage.records_json("City",
+                                                   state_id=self.nv.id,
+                                                   name="Las Vegas"),
+                         [self.lv.to_json()])
+        self.assertEqual(self.storage.records(City, state_id=self.nv.id,
+                                              name="Reno"), [])
+        with patch.object(FileStorage, 'all') as mock_all:
+            self.storage.records(City, state_id=self.ca.id)
+            mock_all.assert_not_called()
+
+    def test_records_where_other_attribute(self):
+        """a filter on an attribute that is not a foreign key stays true"""
+        self.assertEqual(self.storage.records(State, name="California"),
+                         [self.ca.to_dict()])
+        other = State(name="California")
+        self.storage.new(other)
+        self.assertEqual(len(self.storage.records(State,
+                                                  name="California")), 2)
+        other.name = "Oregon"
+        self.assertEqual(self.storage.records_json(State, name="Oregon"),
+                         [other.to_json()])
+        self.assertEqual(self.storage.records(State, name="California"),
+                         [self.ca.to_dict()])
+        self.assertNotIn(("State", "name"), FileStorage._FileStorage__fk)
+
+    def test_lazy_records(self):
+        """in lazy mode only the related records are built"""
+        self.storage.save()
+        FileStorage._FileStorage__lazy = True
+        FileStorage._FileStorage__objects.clear()
+        FileStorage._FileStorage__classes.clear()
+        FileStorage._FileStorage__stamp = None
+        self.storage.reload()
+        ca = self.storage.get(State, self.ca.id)
+        cities = ca.cities
+        self.assertEqual([city.id for city in cities], [self.sf.id])
+        self.assertEqual(len(FileStorage._FileStorage__objects), 2)
+
+
+class TestEntryReader(unittest.TestCase):
+    """Test the streaming reader behind FileStorage.reload"""
+    def read(self, text, chunk_size):
+        """Return the entries EntryReader finds in text"""
+        reader = snapshot.EntryReader(io.BytesIO(text.encode("utf-8")),
+                                      chunk_size)
+        return list(reader)
+
+    def test_matches_json_load(self):
+        """every chunk size yields the same entries as json.loads"""
+        data = {"State.{}".format(i): {"name": "caf\u00e9 \u2603 {}".format(i),
+                                       "nested": {"list": [i, "}", ","]}}
+                for i in range(50)}
+        for text in (json.dumps(data), json.dumps(data, indent=4)):
+            for chunk_size in (1, 2, 7, 64, 1 << 16):
+                with self.subTest(chunk_size=chunk_size):
+                    self.assertEqual(dict(self.read(text, chunk_size)), data)
+
+    def test_empty_object(self):
+        """an empty object yields nothing"""
+        self.assertEqual(self.read(" { } ", 1), [])
+
+    def test_truncated_object(self):
+        """a truncated file raises ValueError"""
+        with self.assertRaises(ValueError):
+            self.read('{"a": {"b": 1}, "c": {"d"', 4)
+
+    def test_reload_reports_progress(self):
+        """reload() reports its progress and throughput"""
+        path = isolate_storage(self, progress_every=2)
+        states = [State(name=str(i)) for i in range(5)]
+        with open(path, 'w') as f:
+            json.dump({"State." + state.id: state.to_dict()
+                       for state in states}, f)
+        reports = []
+        FileStorage().reload(progress=reports.append)
+        self.assertEqual([report["objects"] for report in reports],
+                         [2, 4, 5])
+        stats = FileStorage().load_stats()
+        self.assertEqual(stats["objects"], 5)
+        self.assertEqual(stats["bytes"], os.path.getsize(path))
+        self.assertIn("objects_per_second", stats)
+        self.assertEqual(FileStorage().count(State), 5)
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageThreads(unittest.TestCase):
+    """Test FileStorage shared by many threads at once"""
+    def setUp(self):
+        """Point FileStorage at an empty temporary directory"""
+        self.path = isolate_storage(self)
+        self.storage = FileStorage()
+
+    def run_threads(self, targets):
+        """Start every target together and return the errors they raised"""
+        errors = []
+        barrier = threading.Barrier(len(targets))
+
+        def run(target):
+            """Wait for the other threads, then run target"""
+            try:
+                barrier.wait()
+                target()
+            except Exception as error:
+                errors.append(error)
+        threads = [threading.Thread(target=run, args=(target,))
+                   for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_concurrent_readers_and_writers(self):
+        """hundreds of readers and writers run without errors or losses"""
+        kept = [State(name="kept {}".format(i)) for i in range(50)]
+        for state in kept:
+            self.storage.new(state)
+        self.storage.save()
+        created = []
+
+        def write():
+            """Create two states, delete one of them, then save"""
+            states = [State(name="new"), State(name="gone")]
+            created.extend(states)
+            for state in states:
+                self.storage.new(state)
+            self.storage.delete(states[-1])
+            self.storage.save()
+            self.storage.close()
+
+        def read():
+            """Read the states through every read method, as requests do"""
+            for i in range(5):
+                self.storage.get(State, kept[i].id)
+                self.storage.count(State)
+                self.storage.count()
+                self.storage.all(State)
+                self.storage.records_json(State)
+                self.storage.close()
+        errors = self.run_threads([write] * 100 + [read] * 200)
+        self.assertEqual(errors, [])
+        expected = len(kept) + len(created) - 100
+        self.assertEqual(self.storage.count(State), expected)
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__classes = {}
+        FileStorage._FileStorage__stamp = None
+        self.storage.reload()
+        self.assertEqual(self.storage.count(State), expected)
+
+    def test_readers_do_not_wait_for_save(self):
+        """reads and in-memory writes go on while a save writes the file"""
+        state = State(name="California")
+        self.storage.new(state)
+        writing = threading.Event()
+        resume = threading.Event()
+        dump = snapshot.JSONCodec.dump
+
+        def slow_dump(codec, entries, f):
+            """Hold the save in the middle of writing the file"""
+            writing.set()
+            resume.wait(5)
+            return dump(codec, entries, f)
+        with patch.object(snapshot.JSONCodec, 'dump', autospec=True,
+                          side_effect=slow_dump):
+            saver = threading.Thread(target=self.storage.save)
+            saver.start()
+            self.assertTrue(writing.wait(5))
+            other = State(name="Nevada")
+            self.storage.new(other)
+            self.assertIs(self.storage.get(State, state.id), state)
+            self.assertEqual(self.storage.count(State), 2)
+            resume.set()
+            saver.join()
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertEqual(list(saved), ["State." + state.id])
+
+    def test_close_during_checkpoint(self):
+        """a close() while a save replaces the file does not reload it"""
+        seed = State(name="seed")
+        self.storage.new(seed)
+        self.storage.save()
+        replaced = threading.Event()
+        resume = threading.Event()
+        replace = os.replace
+
+        def slow_replace(src, dst):
+            """Hold the save right after the file is replaced"""
+            replace(src, dst)
+            replaced.set()
+            resume.wait(5)
+        with patch.object(file_storage.os, 'replace',
+                          side_effect=slow_replace):
+            self.storage.new(State(name="B"))
+            saver = threading.Thread(target=self.storage.save)
+            saver.start()
+            self.assertTrue(replaced.wait(5))
+            c = State(name="C")
+            self.storage.new(c)
+            closer = threading.Thread(target=self.storage.close)
+            closer.start()
+            closer.join(0.2)
+            resume.set()
+            saver.join()
+            closer.join()
+        self.storage.save()
+        self.assertIs(self.storage.get(State, seed.id), seed)
+        self.assertIs(self.storage.get(State, c.id), c)
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertCountEqual([record["name"] for record in saved.values()],
+                              ["seed", "B", "C"])
+
+
+def save_states(names):
+    """Save one state per name from a worker process"""
+    for name in names:
+        State(name=name).save()
+
+
+def save_states_elsewhere(names):
+    """Save one state per name from a worker process with its own memory"""
+    for name in ('objects', 'classes', 'raw', 'fk'):
+        setattr(FileStorage, '_FileStorage__' + name, {})
+    FileStorage._FileStorage__dirty = set()
+    FileStorage._FileStorage__stamp = None
+    FileStorage._FileStorage__pending = None
+    FileStorage._FileStorage__commit_window = 0
+    FileStorage().reload()
+    save_states(names)
+
+
+def delete_state(state_id):
+    """Delete a state from a worker process"""
+    storage = FileStorage()
+    storage.reload()
+    storage.delete(storage.get(State, state_id))
+    storage.save()
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+@unittest.skipIf(file_storage.fcntl is None, "no advisory file locks")
+class TestFileStorageProcesses(unittest.TestCase):
+    """Test FileStorage shared by several worker processes"""
+    def setUp(self):
+        """Point FileStorage at an empty temporary directory"""
+        self.path = isolate_storage(self)
+        self.storage = FileStorage()
+        self.context = multiprocessing.get_context("fork")
+
+    def run_workers(self, target, args):
+        """Run target once per args in its own process and wait for all"""
+        workers = [self.context.Process(target=target, args=(arg,))
+                   for arg in args]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+
+    def test_concurrent_saves_keep_every_object(self):
+        """saves from several processes never overwrite each other"""
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                FileStorage._FileStorage__journal = journal
+                names = [["{} {}".format(i, j) for j in range(10)]
+                         for i in range(4)]
+                self.run_workers(save_states, names)
+                self.storage.reload()
+                saved = [state.name for state in
+                         self.storage.all(State).values()]
+                self.assertCountEqual(saved, sum(names, []))
+                for state in self.storage.all(State).values():
+                    self.storage.delete(state)
+                self.storage.save()
+
+    def test_generation(self):
+        """every write from any process advances the generation"""
+        self.assertEqual(self.storage.generation(), 0)
+        State(name="California").save()
+        self.assertEqual(self.storage.generation(), 1)
+        self.run_workers(save_states, [["Nevada"]])
+        self.assertEqual(self.storage.generation(), 2)
+
+    def test_catch_up_reads_only_the_journal_tail(self):
+        """records appended by another process are read incrementally"""
+        FileStorage._FileStorage__journal = True
+        State(name="California").save()
+        self.storage.checkpoint()
+        self.run_workers(save_states, [["Nevada"], ["Texas"]])
+        load = snapshot.JSONCodec.load
+        with patch.object(snapshot.JSONCodec, 'load', autospec=True,
+                          side_effect=load) as mock_load:
+            self.storage.reload()
+            mock_load.assert_not_called()
+        self.assertCountEqual([state.name for state in
+                               self.storage.all(State).values()],
+                              ["California", "Nevada", "Texas"])
+        self.run_workers(save_states, [["Utah"]])
+        with open(self.path + ".journal", 'rb') as f:
+            appended = f.read()[self.storage._FileStorage__journal_offset:]
+        self.assertEqual(json.loads(appended)["value"]["name"], "Utah")
+
+    def test_delete_from_another_process(self):
+        """an object deleted elsewhere goes away here on reload"""
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                FileStorage._FileStorage__journal = journal
+                state = State(name="California")
+                state.save()
+                self.run_workers(delete_state, [state.id])
+                self.storage.reload()
+                self.assertIsNone(self.storage.get(State, state.id))
+
+    def test_unsaved_changes_survive_catch_up(self):
+        """catching up before a write keeps the changes not saved yet"""
+        state = State(name="California")
+        state.save()
+        self.run_workers(save_states, [["Nevada"]])
+        state.name = "Oregon"
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.reload()
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertEqual(saved["State." + state.id]["name"], "Oregon")
+        self.assertEqual(len(saved), 2)
+
+    def test_pending_saves_survive_close(self):
+        """closing before a group commit is written keeps its saves"""
+        FileStorage._FileStorage__commit_window = 60
+        State(name="saved").save()
+        self.storage.flush()
+        handles = [State(name=name).save() for name in ("seed", "pending")]
+        self.assertFalse(handles[0].done())
+        self.run_workers(save_states_elsewhere, [["from-other-worker"]])
+        self.storage.close()
+        self.storage.flush()
+        self.assertTrue(all(handle.wait(0) for handle in handles))
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertCountEqual([record["name"] for record in saved.values()],
+                              ["saved", "seed", "pending",
+                               "from-other-worker"])
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageBulk(unittest.TestCase):
+    """Test the bulk insert and upsert of FileStorage"""
+    def setUp(self):
+        """Point FileStorage at an empty temporary directory"""
+        self.path = isolate_storage(self)
+        self.storage = FileStorage()
+
+    def test_new_many_then_one_write(self):
+        """new_many() then save() writes the snapshot once"""
+        states = [State(name=str(i)) for i in range(100)]
+        with patch.object(FileStorage, 'checkpoint', autospec=True,
+                          side_effect=FileStorage.checkpoint) as mock_write:
+            self.storage.new_many(states)
+            self.storage.save()
+            self.assertEqual(mock_write.call_count, 1)
+        self.assertEqual(self.storage.count(State), 100)
+        with open(self.path) as f:
+            self.assertEqual(len(json.load(f)), 100)
+
+    def test_new_many_journal(self):
+        """in journal mode the objects go out in one append"""
+        FileStorage._FileStorage__journal = True
+        self.storage.new_many([State(name=str(i)) for i in range(10)])
+        with patch('builtins.open', side_effect=open) as mock_open:
+            self.storage.save()
+        appends = [args for args, kwargs in mock_open.call_args_list
+                   if args[1:] == ('ab',)]
+        self.assertEqual(appends, [(self.path + ".journal", 'ab')])
+        with open(self.path + ".journal") as f:
+            self.assertEqual(len(f.readlines()), 10)
+
+    def test_bulk_upsert(self):
+        """records with a stored id update it, the others are created"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.bulk_upsert("State", [{"id": state.id,
+                                            "name": "Nevada"},
+                                           {"name": "Texas"}])
+        self.assertEqual(self.storage.count(State), 2)
+        updated = self.storage.get(State, state.id)
+        self.assertEqual(updated.name, "Nevada")
+        self.assertEqual(updated.created_at, state.created_at)
+        self.assertGreaterEqual(updated.updated_at, state.updated_at)
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertEqual(sorted(value["name"] for value in saved.values()),
+                         ["Nevada", "Texas"])
+
+    def test_bulk_upsert_reindexes(self):
+        """moved foreign keys are seen by the relationship lookups"""
+        city = City(name="Reno", state_id="a")
+        self.storage.new(city)
+        self.assertEqual(self.storage.related(City, "state_id", "a"), [city])
+        self.storage.bulk_upsert(City, [{"id": city.id, "state_id": "b"}])
+        self.assertEqual(self.storage.related(City, "state_id", "a"), [])
+        self.assertEqual(len(self.storage.related(City, "state_id", "b")), 1)
 
 
 if __name__ == '__main__':
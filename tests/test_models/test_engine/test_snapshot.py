@@ -0,0 +1,201 @@
+#!/usr/bin/python3
+"""
+Contains the TestSnapshotDocs and TestSnapshotFormats classes
+"""
+
+import inspect
+import models
+from models.engine import file_storage
+from models.engine import snapshot
+from models.state import State
+from models.user import User
+import os
+import pycodestyle
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+FileStorage = file_storage.FileStorage
+
+
+class TestSnapshotDocs(unittest.TestCase):
+    """Tests to check the documentation and style of the snapshot module"""
+    def test_pep8_conformance_snapshot(self):
+        """Test that models/engine/snapshot.py conforms to PEP8."""
+        pep8s = pycodestyle.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/snapshot.py',
+                                    'convert_snapshot.py',
+                                    'tests/test_models/test_engine/\
+test_snapshot.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_snapshot_docstrings(self):
+        """Test for the docstrings of the module, classes and methods"""
+        self.assertTrue(len(snapshot.__doc__) >= 1)
+        for name, codec in snapshot.formats.items():
+            with self.subTest(codec=name):
+                self.assertTrue(len(codec.__doc__) >= 1)
+                for func in inspect.getmembers(codec, inspect.isfunction):
+                    self.assertTrue(len(func[1].__doc__) >= 1)
+
+
+class TestSnapshotFormats(unittest.TestCase):
+    """Test that every snapshot format round-trips the records"""
+    def setUp(self):
+        """Build a few records the way FileStorage.save does"""
+        objs = [State(name="California"), User(email="café@hbnb.io")]
+        self.entries = [(obj.__class__.__name__ + "." + obj.id,
+                         obj.to_dict()) for obj in objs]
+
+    def available(self):
+        """Return the names of the formats usable here"""
+        names = ["json", "pickle", "marshal", "mmap"]
+        if snapshot.msgpack is not None:
+            names.append("msgpack")
+        return names
+
+    def test_round_trip(self):
+        """load() yields back exactly what dump() wrote"""
+        for name in self.available():
+            with self.subTest(codec=name), tempfile.TemporaryFile() as f:
+                codec = snapshot.get_codec(name)
+                codec.dump(iter(self.entries), f)
+                f.seek(0)
+                self.assertEqual([tuple(entry) for entry in codec.load(f)],
+                                 self.entries)
+
+    def test_mapped_snapshot(self):
+        """a mapped snapshot indexes records by class and decodes one"""
+        with tempfile.TemporaryFile() as f:
+            snapshot.MappedCodec().dump(iter(self.entries), f)
+            mapped = snapshot.MappedCodec().open(f)
+        self.assertEqual(sorted(mapped.index), ["State", "User"])
+        key, record = self.entries[1]
+        offset, length = mapped.index["User"][key]
+        self.assertEqual(mapped.record(offset, length), record)
+
+    def test_not_a_mapped_snapshot(self):
+        """opening another format as a mapped snapshot raises ValueError"""
+        with tempfile.TemporaryFile() as f:
+            snapshot.JSONCodec().dump(iter(self.entries), f)
+            f.flush()
+            with self.assertRaises(ValueError):
+                snapshot.MappedCodec().open(f)
+
+    def test_unknown_format(self):
+        """an unknown format name raises ValueError"""
+        with self.assertRaises(ValueError):
+            snapshot.get_codec("yaml")
+
+    @unittest.skipIf(snapshot.msgpack is not None, "msgpack is installed")
+    def test_msgpack_missing(self):
+        """selecting msgpack without the package raises ImportError"""
+        with self.assertRaises(ImportError):
+            snapshot.get_codec("msgpack")
+
+    def test_convert(self):
+        """convert() rewrites a snapshot from one format to another"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        paths = {}
+        with open(os.path.join(tmp.name, "file.json"), 'wb') as f:
+            snapshot.JSONCodec().dump(iter(self.entries), f)
+            paths["json"] = f.name
+        for name in self.available()[1:]:
+            with self.subTest(codec=name):
+                paths[name] = os.path.join(tmp.name, "file." + name)
+                snapshot.convert(paths["json"], "json", paths[name], name)
+                back = os.path.join(tmp.name, name + ".json")
+                snapshot.convert(paths[name], name, back, "json")
+                with open(paths["json"], 'rb') as a, open(back, 'rb') as b:
+                    self.assertEqual(a.read(), b.read())
+
+    def test_convert_script(self):
+        """convert_snapshot.py converts without importing models"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        src = os.path.join(tmp.name, "file.json")
+        with open(src, 'wb') as f:
+            snapshot.JSONCodec().dump(iter(self.entries), f)
+        dst = os.path.join(tmp.name, "file.pickle")
+        script = os.path.join(os.path.dirname(os.path.abspath(
+            snapshot.__file__)), "..", "..", "convert_snapshot.py")
+        # importing models in db mode would fail to reach this database
+        env = dict(os.environ, HBNB_TYPE_STORAGE="db",
+                   HBNB_MYSQL_HOST="nowhere.invalid")
+        result = subprocess.run([sys.executable, script, src, dst,
+                                 "--to", "pickle"], cwd=tmp.name, env=env,
+                                capture_output=True, text=True)
+        self.assertEqual((result.returncode, result.stderr), (0, ""))
+        with open(dst, 'rb') as f:
+            self.assertEqual(list(snapshot.PickleCodec().load(f)),
+                             self.entries)
+
+    def isolate_storage(self, **settings):
+        """Point FileStorage at a temporary snapshot for one test"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "file.snapshot")
+        patches = {'file_path': path, 'objects': {}, 'classes': {},
+                   'dirty': set(), 'stamp': None, 'journal': False,
+                   'commit_window': 0, 'lazy': False, 'raw': {},
+                   'generation': None, 'journal_offset': 0}
+        patches.update(settings)
+        for name, value in patches.items():
+            patcher = patch.object(FileStorage, '_FileStorage__' + name,
+                                   value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return path
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_file_storage_codec(self):
+        """FileStorage saves and reloads through the configured format"""
+        path = self.isolate_storage(codec="pickle")
+        storage = FileStorage()
+        state = State(name="California")
+        storage.new(state)
+        storage.save()
+        with open(path, 'rb') as f:
+            self.assertEqual(list(snapshot.PickleCodec().load(f)),
+                             [("State." + state.id, state.to_dict())])
+        FileStorage._FileStorage__objects.clear()
+        FileStorage._FileStorage__classes.clear()
+        FileStorage._FileStorage__stamp = None
+        storage.reload()
+        self.assertEqual(storage.get(State, state.id).to_dict(),
+                         state.to_dict())
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_file_storage_mapped(self):
+        """lazy FileStorage decodes mapped records only when asked for"""
+        self.isolate_storage(codec="mmap", lazy=True)
+        storage = FileStorage()
+        states = [State(name=str(i)) for i in range(3)]
+        user = User(email="a@hbnb.io")
+        for obj in states + [user]:
+            storage.new(obj)
+        storage.save()
+        FileStorage._FileStorage__objects.clear()
+        FileStorage._FileStorage__classes.clear()
+        FileStorage._FileStorage__stamp = None
+        decode = snapshot.MappedSnapshot.record
+        with patch.object(snapshot.MappedSnapshot, 'record', autospec=True,
+                          side_effect=decode) as mock_record:
+            storage.reload()
+            self.assertEqual(storage.count(), 4)
+            mock_record.assert_not_called()
+            self.assertEqual(storage.get(User, user.id).to_dict(),
+                             user.to_dict())
+            self.assertEqual(mock_record.call_count, 1)
+            self.assertEqual(len(storage.all(State)), 3)
+            self.assertEqual(mock_record.call_count, 4)
+            storage.save()
+        storage.reload()
+        self.assertEqual(storage.count(), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+#!/usr/bin/python3
+"""
+Contains the TestSQLiteStorageDocs and TestSQLiteStorage classes
+"""
+
+import inspect
+import models
+from models.engine import sqlite_storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+import os
+import pycodestyle
+import tempfile
+import unittest
+from unittest.mock import patch
+SQLiteStorage = sqlite_storage.SQLiteStorage
+
+
+class TestSQLiteStorageDocs(unittest.TestCase):
+    """Tests to check the documentation and style of SQLiteStorage class"""
+    def test_pep8_conformance_sqlite_storage(self):
+        """Test that models/engine/sqlite_storage.py conforms to PEP8."""
+        pep8s = pycodestyle.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/sqlite_storage.py',
+                                    'tests/test_models/test_engine/\
+test_sqlite_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_sqlite_storage_docstrings(self):
+        """Test for the docstrings of the module, class and methods"""
+        self.assertTrue(len(sqlite_storage.__doc__) >= 1)
+        self.assertTrue(len(SQLiteStorage.__doc__) >= 1)
+        self.assertTrue(len(sqlite_storage.set_pragmas.__doc__) >= 1)
+        for func in inspect.getmembers(SQLiteStorage, inspect.isfunction):
+            self.assertTrue(len(func[1].__doc__) >= 1)
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestSQLiteStorage(unittest.TestCase):
+    """Test SQLiteStorage against a temporary database file"""
+    def setUp(self):
+        """Open a storage on an empty database file"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "hbnb.db")
+        with patch.dict(os.environ, {"HBNB_SQLITE_PATH": path}):
+            self.storage = SQLiteStorage()
+        self.storage.reload()
+        self.addCleanup(self.storage.close)
+
+    def query(self, sql):
+        """Run sql on the storage engine and return the rows"""
+        session = self.storage._DBStorage__session
+        return session.connection().exec_driver_sql(sql).fetchall()
+
+    def test_pragmas(self):
+        """connections use WAL and enforce foreign keys"""
+        self.assertEqual(self.query("PRAGMA journal_mode"), [("wal",)])
+        self.assertEqual(self.query("PRAGMA foreign_keys"), [(1,)])
+        self.assertEqual(self.query("PRAGMA synchronous"), [(1,)])
+
+    def indexes(self):
+        """Return the names of the indexes in the database"""
+        return [row[0] for row in self.query(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")]
+
+    def plan(self, query):
+        """Return the EXPLAIN QUERY PLAN details of an ORM query"""
+        sql = query.statement.compile(
+            dialect=self.storage._DBStorage__engine.dialect,
+            compile_kwargs={"literal_binds": True})
+        return " ".join(row[-1] for row in
+                        self.query("EXPLAIN QUERY PLAN {}".format(sql)))
+
+    def test_indexes(self):
+        """the indexes the models declare exist"""
+        for name in ("ix_cities_state_id", "ix_places_city_id_price_by_night",
+                     "ix_places_user_id", "ix_reviews_place_id_created_at",
+                     "ix_reviews_user_id", "ix_place_amenity_amenity_id"):
+            self.assertIn(name, self.indexes())
+
+    def test_create_indexes(self):
+        """create_indexes() adds the indexes an older database lacks"""
+        session = self.storage._DBStorage__session
+        session.connection().exec_driver_sql("DROP INDEX ix_cities_state_id")
+        session.commit()
+        self.assertNotIn("ix_cities_state_id", self.indexes())
+        self.storage.create_indexes()
+        self.assertIn("ix_cities_state_id", self.indexes())
+
+    def test_queries_use_indexes(self):
+        """relationship and filter queries search an index, never scan"""
+        session = self.storage._DBStorage__session
+        queries = {
+            "ix_cities_state_id":
+                session.query(City).filter(City.state_id == "s"),
+            "ix_places_city_id_price_by_night":
+                session.query(Place).filter(Place.city_id == "c",
+                                            Place.price_by_night < 100),
+            "ix_places_user_id":
+                session.query(Place).filter(Place.user_id == "u"),
+            "ix_reviews_place_id_created_at":
+                session.query(Review).filter(Review.place_id == "p")
+                .order_by(Review.created_at),
+            "ix_place_amenity_amenity_id":
+                session.query(Place).join(Place.amenities)
+                .filter(Amenity.id == "a"),
+        }
+        for index, query in queries.items():
+            with self.subTest(index=index):
+                plan = self.plan(query)
+                self.assertIn(index, plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_storage_api(self):
+        """new, save, get, count, all and delete work as in DBStorage"""
+        state = State(name="California")
+        city = City(name="San Francisco", state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.get(State, state.id).name,
+                         "California")
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(list(self.storage.all(City)),
+                         ["City." + city.id])
+        self.storage.delete(self.storage.get(City, city.id))
+        self.storage.save()
+        self.assertEqual(self.storage.count(City), 0)
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestSQLiteReplica(unittest.TestCase):
+    """Test the read routing to a replica, with two SQLite files"""
+    def setUp(self):
+        """Open a storage on a primary and a replica database file"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.paths = {"HBNB_SQLITE_PATH": os.path.join(tmp.name, "p.db"),
+                      "HBNB_SQLITE_REPLICA_PATH":
+                          os.path.join(tmp.name, "r.db")}
+        with patch.dict(os.environ, self.paths):
+            self.storage = SQLiteStorage()
+        self.storage.reload()
+        self.addCleanup(self.storage.close)
+
+    def replicate(self):
+        """Copy the states of the primary to the replica"""
+        table = State.__table__
+        with self.storage._DBStorage__engine.connect() as connection:
+            rows = connection.execute(table.select()).mappings().all()
+        with self.storage._DBStorage__replica_engine.begin() as connection:
+            connection.execute(table.insert().prefix_with("OR REPLACE"),
+                               [dict(row) for row in rows])
+
+    def test_reads_go_to_the_replica(self):
+        """a request that did not write reads from the replica"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+        self.assertIsNone(self.storage.get(State, state.id))
+        self.assertEqual(self.storage.count(State), 0)
+        self.storage.close()
+        self.replicate()
+        self.assertEqual(self.storage.get(State, state.id).name,
+                         "California")
+        self.assertEqual(list(self.storage.all(State)),
+                         ["State." + state.id])
+
+    def test_reads_after_a_write_stick_to_the_primary(self):
+        """once a request writes, its reads see its own writes"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.assertEqual(self.storage.count(), 1)
+        self.storage.close()
+        self.assertEqual(self.storage.count(), 0)
+
+    def test_update_of_a_replica_object(self):
+        """an object read from the replica can be changed and saved"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.replicate()
+        self.storage.close()
+        read = self.storage.get(State, state.id)
+        read.name = "Nevada"
+        self.storage.new(read)
+        self.storage.save()
+        self.storage.close()
+        self.replicate()
+        self.assertEqual(self.storage.get(State, state.id).name, "Nevada")
+        self.storage.close()
+        self.storage.delete(self.storage.get(State, state.id))
+        self.storage.save()
+        self.assertIsNone(self.storage.get(State, state.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
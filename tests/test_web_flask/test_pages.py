@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""
+Contains the TestPageQueries class
+"""
+
+from api.v1.app import app as api_app
+import importlib
+import models
+from models.amenity import Amenity
+from models.city import City
+from models.state import State
+from sqlalchemy import event
+import unittest
+
+
+@unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+class TestPageQueries(unittest.TestCase):
+    """Test that the pages load their relationships without N+1 queries"""
+    @classmethod
+    def setUpClass(cls):
+        """Store a few states with cities and an amenity"""
+        for i in range(3):
+            state = State(name="State {}".format(i))
+            models.storage.new(state)
+            for j in range(2):
+                models.storage.new(City(name="City {}".format(j),
+                                        state_id=state.id))
+        models.storage.new(Amenity(name="Wifi"))
+        models.storage.save()
+        cls.state_id = state.id
+
+    def count_queries(self, app, url):
+        """GET url from app on a fresh session and count the SELECTs"""
+        models.storage.close()
+        engine = models.storage._DBStorage__engine
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            """Keep the statement about to be run"""
+            statements.append(statement)
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = app.test_client().get(url)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        self.assertEqual(response.status_code, 200)
+        return len([s for s in statements if s.startswith("SELECT")])
+
+    def page(self, name):
+        """Return the Flask app of a web_flask module"""
+        return importlib.import_module("web_flask." + name).app
+
+    def test_cities_by_states(self):
+        """states and their cities take one query each"""
+        self.assertEqual(self.count_queries(self.page("8-cities_by_states"),
+                                            "/cities_by_states"), 2)
+
+    def test_states(self):
+        """a state page loads the cities of every state in one query"""
+        self.assertEqual(self.count_queries(
+            self.page("9-states"), "/states/" + self.state_id), 2)
+
+    def test_hbnb_filters(self):
+        """the filters page adds only the amenities query"""
+        self.assertEqual(self.count_queries(self.page("10-hbnb_filters"),
+                                            "/hbnb_filters"), 3)
+
+    def test_api_cities_of_state(self):
+        """the cities of a state come with the state lookup"""
+        url = "/api/v1/states/{}/cities".format(self.state_id)
+        self.assertEqual(self.count_queries(api_app, url), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()